@@ -0,0 +1,310 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module asyncbot
+
+    asyncio versions of the TurtlePlotBot, JoyStick and UI classes that let
+    motion, display updates and input handling run as cooperating tasks.
+
+    Example::
+
+        import asyncbot
+
+        async def main():
+            uio = asyncbot.AsyncUI()
+            bot = asyncbot.AsyncTurtlePlotBot()
+
+            if await uio.menu("Draw?", ("Yes", "No"), 0) == 0:
+                await bot.pendown()
+                await bot.forward(30)
+
+            await bot.done()
+
+        asyncbot.asyncio.run(main())
+
+"""
+
+# pylint: disable-msg=import-error, no-member
+import time
+import button
+import oledui
+from turtleplotbot import TurtlePlotBot, DRAW
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+# pylint: disable-msg=invalid-name
+const = lambda x: x
+
+_BURST_MS = const(20)       # ms of stepping between chances for other tasks
+_BUDGET_US = const(2000)    # longest acceptable pause in stepping in us
+_POLL_MS = const(10)        # ms between joystick event queue checks
+
+
+async def sleep_ms(delay):
+    """
+    Sleep for delay ms using uasyncio or asyncio
+    """
+    await asyncio.sleep(delay / 1000)
+
+
+def _motion(name):
+    """
+    Create a coroutine that calls the named TurtlePlotBot motion method,
+    which queues its moves, then waits while the moves are run.
+    """
+    async def wrapper(self, *args):
+        result = getattr(self.bot, name)(*args)
+        await self.run()
+        return result
+
+    return wrapper
+
+
+class QueuedTurtlePlotBot(TurtlePlotBot):
+    """
+    TurtlePlotBot that queues pen and stepper moves in `queue` instead of
+    running them.
+    """
+    def __init__(self, **kwargs):
+        self.queue = []
+        super().__init__(**kwargs)
+
+    def _movesteppers(self, left, right, feed=DRAW):
+        """
+        Queue a stepper move
+
+        Args:
+            left (float or integer): millimeters to move left stepper
+            right (float or integer): millimeters to move right stepper
+            feed (optional int): speed to move at, TRAVEL, DRAW or TURN
+        """
+        self.queue.append((left, right, feed))
+
+    def _pen(self, down):
+        """
+        Queue a pen move
+
+        Args:
+                down (boolean):
+        """
+        self.queue.append(down)
+
+
+class AsyncTurtlePlotBot():
+    """
+    TurtlePlotBot with awaitable motion methods. Pen and stepper moves are
+    queued by a `QueuedTurtlePlotBot` then stepped in bursts of about
+    `burst_ms` ms, yielding to other tasks between bursts. Methods that do not
+    move the robot are passed on to the `QueuedTurtlePlotBot` in `bot`.
+
+    Args:
+        burst_ms (optional int): ms of stepping between yields, defaults to 20ms
+        budget_us (optional int): longest acceptable pause in stepping while
+            other tasks run, longer pauses are counted in `overruns`.
+
+    Other arguments are passed to `TurtlePlotBot`
+
+    Other tasks should only do short pieces of work between awaits as every
+    yield pauses the steppers until control returns. The longest pause is
+    kept in `max_gap_us`.
+    """
+    def __init__(self, burst_ms=_BURST_MS, budget_us=_BUDGET_US, **kwargs):
+        self.bot = QueuedTurtlePlotBot(**kwargs)
+        self._cancel = False
+        self.burst = max(1, burst_ms * 1000 // self.bot._step_delay)
+        self.budget_us = budget_us
+        self.max_gap_us = 0
+        self.overruns = 0
+
+    def __getattr__(self, name):
+        return getattr(self.bot, name)
+
+    def cancel(self):
+        """
+        Stop the current move at the end of the current burst and discard
+        any queued moves. The turtle's position will no longer match the
+        robot's position.
+        """
+        self._cancel = True
+        self.bot.queue = []
+
+    async def run(self):
+        """
+        Run the queued pen and stepper moves
+        """
+        bot = self.bot
+        self._cancel = False
+        while bot.queue and not self._cancel:
+            item = bot.queue.pop(0)
+            if isinstance(item, bool):
+                bot._servo(item)
+                await sleep_ms(bot._pen_delay)
+                continue
+
+            move = bot._plan(*item)
+            bot._engage()
+            while bot._step(move, self.burst) and not self._cancel:
+                start = time.ticks_us()
+                await asyncio.sleep(0)
+                gap = time.ticks_diff(time.ticks_us(), start)
+                if gap > self.max_gap_us:
+                    self.max_gap_us = gap
+                if gap > self.budget_us:
+                    self.overruns += 1
+
+            if self._cancel:
+                bot._release()
+            else:
+                bot._idle()
+            bot._segment_done(move)
+
+    async def done(self):
+        """
+        Raise pen and turn off the stepper motors.
+        """
+        self.bot.penup()
+        await self.run()
+        self.bot.done()
+        self.bot.queue = []
+
+    forward = fd = _motion("forward")
+    back = bk = backward = _motion("back")
+    right = rt = _motion("right")
+    left = lt = _motion("left")
+    goto = setpos = setposition = _motion("goto")
+    setx = _motion("setx")
+    sety = _motion("sety")
+    home = _motion("home")
+    setheading = seth = _motion("setheading")
+    circle = _motion("circle")
+    penup = _motion("penup")
+    pendown = _motion("pendown")
+    write = _motion("write")
+
+
+class AsyncJoyStick(button.JoyStick):
+    """
+    JoyStick with an awaitable `read`, checks the event queue every
+    `poll_ms` ms and sleeps in between so other tasks can run.
+
+    Args:
+        poll_ms (optional int): ms between event queue checks, defaults to 10ms
+
+    Other arguments are passed to `button.JoyStick`
+    """
+    def __init__(self, poll_ms=_POLL_MS, **kwargs):
+        super().__init__(**kwargs)
+        self.poll_ms = poll_ms
+
+    async def read(self, max_wait=0):
+        """
+        Read JoyStick
+
+        Args: max_wait (optional int): maximum time to wait for button press
+            in ms.
+
+        Returns: int: the same values as `button.JoyStick.read`
+        """
+        start_ms = time.ticks_ms()
+
+        while True:
+            event = self.event()
+            if event is not None:
+                if event[1] != button.RELEASED:
+                    return event[0]
+                continue
+
+            if max_wait and time.ticks_diff(time.ticks_ms(), start_ms) > max_wait:
+                return 0
+
+            await sleep_ms(self.poll_ms)
+
+
+class AsyncUI(oledui.UI):
+    """
+    UI with awaitable `wait`, `menu`, `string`, `integer`, `select` and
+    `form` methods, other tasks run while waiting for the joystick.
+
+    Args:
+        joystick (optional AsyncJoyStick): joystick to use, defaults to
+            creating an AsyncJoyStick.
+    """
+    def __init__(self, joystick=None):
+        super().__init__(AsyncJoyStick() if joystick is None else joystick)
+
+    async def _arun(self, task):
+        """
+        Run a UI generator to completion, awaiting the joystick each time it
+        yields.
+
+        Args:
+            task (generator): UI generator to run
+
+        Returns:
+            the generator's return value
+        """
+        try:
+            wait = next(task)
+            while True:
+                wait = task.send(await self.joystick.read(wait))
+        except StopIteration as result:
+            return result.value
+
+    async def wait(self, text, line, reverse=False):
+        """
+        Awaitable `oledui.UI.wait`
+        """
+        return await self._arun(self._wait_task(text, line, reverse))
+
+    async def menu(self, title, menu, active=None, menu_text=None):
+        """
+        Awaitable `oledui.UI.menu`
+        """
+        return await self._arun(self._menu_task(title, menu, active, menu_text))
+
+    async def string(self, line, column, max_length, value, valid=None):
+        """
+        Awaitable `oledui.UI.string`
+        """
+        return await self._arun(self._string_task(line, column, max_length, value, valid))
+
+    async def integer(self, line, column, max_length, value):
+        """
+        Awaitable `oledui.UI.integer`
+        """
+        return await self._arun(self._integer_task(line, column, max_length, value))
+
+    async def select(self, line, column, options, value):
+        """
+        Awaitable `oledui.UI.select`
+        """
+        return await self._arun(self._select_task(line, column, options, value))
+
+    async def form(self, items, line=7):
+        """
+        Awaitable `oledui.UI.form`
+        """
+        return await self._arun(self._form_task(items, line))
@@ -29,7 +29,9 @@ module button
 
 # pylint: disable-msg=import-error, no-member
 import time
+import array
 import machine
+import timers
 
 # pylint: disable-msg=invalid-name
 const = lambda x: x
@@ -42,6 +44,10 @@ CENTER = const(38)
 ZERO = const(0)
 SS = const(1)
 
+PRESSED = const(1)          # JoyStick event kinds
+RELEASED = const(2)
+LONG_PRESSED = const(3)
+
 # pylint: disable-msg=too-many-instance-attributes
 class Button():
     """
@@ -105,23 +111,170 @@ class Button():
         self.last = value
         return 0
 
-# pylint: disable-msg=too-few-public-methods
+# pylint: disable-msg=too-many-instance-attributes
+class _Dispatcher():
+    """
+    Pin change interrupts, debounce timer and event queue shared by every
+    JoyStick. A pin has one interrupt handler and a timer one callback, so
+    they are owned here rather than by each JoyStick, a JoyStick made by a
+    program would otherwise take them from the menu's JoyStick.
+
+    Args:
+        buttons (list of tuples): (value, Button) for each switch
+        size (int): maximum number of queued events
+    """
+    def __init__(self, buttons, size):
+        self.users = 0
+        self._size = size
+        self._codes = array.array('h', (0 for _ in range(size)))
+        self._kinds = bytearray(size)
+        self._head = 0
+        self._tail = 0
+        self._long_button = -1
+        self._long_ms = 0
+
+        # bound methods allocate, create them once for use in handlers
+        self._settle_ref = self._settle
+        self._long_ref = self._long
+
+        self._timer = timers.timer(timers.JOYSTICK)
+        self.buttons = []
+        self.attach(buttons)
+
+    def attach(self, buttons):
+        """
+        Use buttons, releasing the interrupts of the buttons used before
+        """
+        for button in self.buttons:
+            button[1].pin.irq(handler=None)
+
+        self.buttons = buttons
+        self.debounce = max(button[1].debounce for button in buttons)
+        self._states = bytearray(1 for _ in buttons)
+        self._long_button = -1
+        for button in buttons:
+            button[1].pin.irq(
+                handler=self._edge,
+                trigger=machine.Pin.IRQ_FALLING | machine.Pin.IRQ_RISING)
+
+    def deinit(self):
+        """
+        Release the pin interrupts and the timer
+        """
+        self._timer.deinit()
+        for button in self.buttons:
+            button[1].pin.irq(handler=None)
+
+    def _edge(self, _):
+        """
+        Pin change handler, (re)start the debounce timer so the pins are read
+        once they have been stable for the debounce time.
+        """
+        self._timer.init(
+            mode=machine.Timer.ONE_SHOT,
+            period=self.debounce,
+            callback=self._settle_ref)
+
+    def _settle(self, _):
+        """
+        Debounce timer handler, queue events for buttons that changed state
+        then wait for the rest of a long press on the same timer.
+        """
+        for index, button in enumerate(self.buttons):
+            value = button[1].pin.value()
+            if value != self._states[index]:
+                self._states[index] = value
+                if value == 0:
+                    self._push(button[0], PRESSED)
+                    if button[1].long:
+                        self._long_button = index
+                        self._long_ms = time.ticks_add(time.ticks_ms(), button[1].long)
+                else:
+                    self._push(button[0], RELEASED)
+                    if self._long_button == index:
+                        self._long_button = -1
+
+        if self._long_button >= 0:
+            self._timer.init(
+                mode=machine.Timer.ONE_SHOT,
+                period=max(time.ticks_diff(self._long_ms, time.ticks_ms()), 1),
+                callback=self._long_ref)
+
+    def _long(self, _):
+        """
+        Long press timer handler, queue a long press if still held
+        """
+        index = self._long_button
+        if index >= 0 and self._states[index] == 0:
+            self._long_button = -1
+            self._push(-self.buttons[index][0], LONG_PRESSED)
+
+    def _push(self, code, kind):
+        """
+        Add an event to the queue, called from interrupt handlers so must not
+        allocate memory.
+        """
+        head = (self._head + 1) % self._size
+        if head != self._tail:
+            self._codes[self._head] = code
+            self._kinds[self._head] = kind
+            self._head = head
+
+    def pending(self):
+        """
+        Return the number of queued events
+        """
+        return (self._head - self._tail) % self._size
+
+    def clear(self):
+        """
+        Discard any queued events
+        """
+        self._tail = self._head
+
+    def event(self):
+        """
+        Remove the oldest event from the queue, None if it is empty
+        """
+        if self._tail == self._head:
+            return None
+
+        tail = self._tail
+        self._tail = (tail + 1) % self._size
+        return (self._codes[tail], self._kinds[tail])
+
+
+_dispatcher = None          # the _Dispatcher shared by every JoyStick
+
+
 class JoyStick():
     """
     JoyStick class, handles reading a five way switch style joystick. Uses
-    the Button class and supports long press notification.
+    pin change interrupts and timer based debouncing to queue press, release
+    and long press events, supports long press notification.
+
+    Every JoyStick shares one set of interrupts, timer and event queue, so a
+    program can make its own JoyStick without stopping the menu's JoyStick
+    from seeing events when the program returns. They are released by
+    `deinit` once every JoyStick using them has been deinitialized.
     """
-    def __init__(self, buttons=None):
+    def __init__(self, buttons=None, size=16):
         """
         Initialize JoyStick
 
         Args: buttons (list of tuples): The first tuple element should be the
             value to return when switch is pressed and released. The second
-            tuple element should be a Button object for the switch.
+            tuple element should be a Button object for the switch. Defaults
+            to the buttons already in use or the robot's joystick.
 
+            size (optional int): maximum number of queued events, defaults
+            to 16. Events arriving while the queue is full are dropped. Only
+            used by the first JoyStick, later ones share its queue.
         """
-        if buttons is None:
-            self.buttons = [
+        global _dispatcher      # pylint: disable-msg=global-statement
+
+        if buttons is None and _dispatcher is None:
+            buttons = [
                 (UP, Button(UP)),
                 (DOWN, Button(DOWN)),
                 (LEFT, Button(LEFT)),
@@ -129,15 +282,69 @@ class JoyStick():
                 (CENTER, Button(CENTER)),
                 (SS, Button(ZERO, long=0))
             ]
-        else:
-            self.buttons = buttons
 
-        self.max_ms = 0
-        self.start_ms = 0
+        if _dispatcher is None:
+            _dispatcher = _Dispatcher(buttons, size)
+        elif buttons is not None:
+            _dispatcher.attach(buttons)
+
+        _dispatcher.users += 1
+        self._dispatcher = _dispatcher
+
+    @property
+    def buttons(self):
+        """
+        The (value, Button) tuples of the switches read
+        """
+        return self._dispatcher.buttons
+
+    def deinit(self):
+        """
+        Stop using the joystick, the interrupts and timer are released when
+        no other JoyStick is using them.
+        """
+        global _dispatcher      # pylint: disable-msg=global-statement
+
+        dispatcher = self._dispatcher
+        if dispatcher is None:
+            return
+
+        self._dispatcher = None
+        dispatcher.users -= 1
+        if dispatcher.users == 0:
+            dispatcher.deinit()
+            if _dispatcher is dispatcher:
+                _dispatcher = None
+
+    def pending(self):
+        """
+        Return the number of queued events
+
+        Returns:
+            int: number of events waiting to be read
+        """
+        return self._dispatcher.pending()
+
+    def clear(self):
+        """
+        Discard any queued events
+        """
+        self._dispatcher.clear()
+
+    def event(self):
+        """
+        Remove the oldest event from the queue
+
+        Returns:
+            tuple (code, kind) or None if the queue is empty.
+                code: the button value, negative for a long press
+                kind: PRESSED, RELEASED or LONG_PRESSED
+        """
+        return self._dispatcher.event()
 
     def read(self, max_wait=0):
         """
-        Read JoyStick
+        Read JoyStick, sleeping until a button event is queued
 
         Args: max_wait (optional int): maximum time to wait for button press
             in ms.
@@ -149,15 +356,16 @@ class JoyStick():
             was specified and `max_wait` ms pass without a button being
             pressed amd release a 0 will be returned.
         """
-        self.max_ms = max_wait
-        if max_wait:
-            self.start_ms = time.ticks_ms()
+        start_ms = time.ticks_ms()
 
         while True:
-            for button in self.buttons:
-                result = button[1].read()
-                if result:
-                    return button[0] * result
+            event = self.event()
+            if event is not None:
+                if event[1] != RELEASED:
+                    return event[0]
+                continue
 
-            if self.max_ms and time.ticks_ms() - self.start_ms > self.max_ms:
+            if max_wait and time.ticks_diff(time.ticks_ms(), start_ms) > max_wait:
                 return 0
+
+            machine.idle()
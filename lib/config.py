@@ -0,0 +1,197 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module config
+
+    Cached btree configuration store
+
+"""
+
+# pylint: disable-msg=import-error
+import btree
+import micropython
+import timers
+
+try:
+    from machine import Timer
+except ImportError:
+    Timer = None
+
+# pylint: disable-msg=invalid-name
+const = lambda x: x
+
+_DELAY = const(1000)        # ms to wait after the last change before writing
+
+
+class Config():
+    """
+    Config store backed by a btree file. The file is read once on first use,
+    reads are served from memory and changes are written back in a single
+    btree session either by calling `flush` or automatically `delay` ms
+    after the last change.
+
+    Args:
+        filename (optional str): btree file to use, defaults to "ui.cfg"
+        delay (optional int): ms after the last change to write pending
+            changes, defaults to 1000ms, a value of 0 will only write pending
+            changes when `flush` is called.
+        timer (optional int): id passed to `timers.timer` for the delayed
+            write timer, defaults to `timers.CONFIG`
+    """
+    def __init__(self, filename="ui.cfg", delay=_DELAY, timer=timers.CONFIG):
+        self.filename = filename
+        self.delay = delay
+        self._timer_id = timer
+        self._timer = None
+        self._values = None
+        self._pending = {}
+        self._flush_ref = self._scheduled_flush
+
+    @staticmethod
+    def _encode(value):
+        """
+        Return value as bytes
+        """
+        return value.encode() if isinstance(value, str) else bytes(value)
+
+    def _open(self):
+        """
+        Open the btree file, creating it if needed
+
+        Returns:
+            tuple (file, btree)
+        """
+        try:
+            cfg_file = open(self.filename, "r+b")
+        except OSError:
+            cfg_file = open(self.filename, "w+b")
+
+        return (cfg_file, btree.open(cfg_file))
+
+    def _load(self):
+        """
+        Read every setting into memory if not already loaded
+        """
+        if self._values is None:
+            cfg_file, cfg_db = self._open()
+            self._values = {key: cfg_db[key] for key in cfg_db}
+            cfg_db.close()
+            cfg_file.close()
+
+    def reload(self):
+        """
+        Discard pending changes and cached settings, the file will be read
+        again on the next access. Use after the file is changed directly.
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+        self._pending = {}
+        self._values = None
+
+    def get(self, cfg_name, default=b''):
+        """
+        Get a setting
+
+        Args:
+            cfg_name ([str, bytes]): name of setting to get
+            default (optional bytes): value to return if the setting does not
+                exist, defaults to b''
+
+        Returns:
+            (bytes): value of setting
+        """
+        self._load()
+        return self._values.get(self._encode(cfg_name), default)
+
+    def put(self, cfg_name, cfg_value):
+        """
+        Change a setting, the change is written when the store is flushed
+
+        Args:
+            cfg_name ([str, bytes, bytearray]): name of setting to store
+            cfg_value ([str, bytes, bytearray]): value of setting to store
+        """
+        self.update({cfg_name: cfg_value})
+
+    def update(self, settings):
+        """
+        Change several settings at once. All of the changes are applied
+        together and written in the same btree session.
+
+        Args:
+            settings (dict): setting names and values to store
+        """
+        changes = {
+            self._encode(name): self._encode(value)
+            for name, value in settings.items()}
+
+        self._load()
+        self._values.update(changes)
+        self._pending.update(changes)
+        self._schedule()
+
+    def _schedule(self):
+        """
+        (Re)start the delayed write timer if delayed writes are enabled
+        """
+        if not self.delay or Timer is None:
+            return
+
+        if self._timer is None:
+            self._timer = timers.timer(self._timer_id)
+
+        self._timer.init(
+            period=self.delay,
+            mode=Timer.ONE_SHOT,
+            callback=self._expired)
+
+    def _expired(self, _):
+        """
+        Timer callback, defer the write until it is safe to use the filesystem
+        """
+        micropython.schedule(self._flush_ref, None)
+
+    def _scheduled_flush(self, _):
+        """
+        micropython.schedule callback for delayed writes
+        """
+        self.flush()
+
+    def flush(self):
+        """
+        Write pending changes to the btree file
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+
+        if not self._pending:
+            return
+
+        cfg_file, cfg_db = self._open()
+        for name, value in self._pending.items():
+            cfg_db[name] = value
+
+        cfg_db.flush()
+        cfg_db.close()
+        cfg_file.close()
+        self._pending = {}
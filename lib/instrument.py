@@ -0,0 +1,185 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module instrument
+
+    Count calls, time and allocations of the TurtlePlot primitives to see
+    where a plot's time goes.
+
+    Example::
+
+        import instrument
+
+        stats = instrument.Stats()
+        stats.attach(bot)
+        bot.write("Hello!")
+        stats.detach(bot)
+        print(stats.csv())
+
+    `attach` replaces the hooked methods of one turtle with wrappers that
+    add to a table allocated when the `Stats` is made. The wrappers are
+    instance attributes, so a turtle that was never attached, or has been
+    detached, runs the class methods with no added cost.
+
+    Times include the time spent in hooked methods called by the method, so
+    `_goto` includes the `_rotate` and `_movesteppers` calls it makes.
+    Allocations are the growth of `gc.mem_alloc` over the call and miss
+    memory freed by a collection during the call.
+
+"""
+
+# pylint: disable-msg=import-error
+import gc
+import time
+from array import array
+import ujson
+
+# pylint: disable-msg=invalid-name
+const = lambda x: x
+
+HOOKS = ("_go", "_rotate", "_goto", "_pen", "_glyph", "_movesteppers")
+
+_COUNT = const(0)           # table fields for each hook
+_TIME_US = const(1)
+_ALLOCATED = const(2)
+_FIELDS = const(3)
+
+_FIELD_NAMES = ("calls", "us", "bytes")
+
+try:
+    _mem_alloc = gc.mem_alloc
+except AttributeError:
+    _mem_alloc = lambda: 0
+
+
+class Stats():
+    """
+    Table of call counts, cumulative microseconds and bytes allocated for
+    each hooked method.
+
+    Args:
+        hooks (optional tuple): names of the methods to hook, defaults to
+            `HOOKS`
+    """
+    def __init__(self, hooks=HOOKS):
+        self.hooks = hooks
+        self.table = array("q", [0] * (_FIELDS * len(hooks)))
+
+    def reset(self):
+        """
+        Zero the table
+        """
+        table = self.table
+        for i in range(len(table)):
+            table[i] = 0
+
+    def _hook(self, method, base):
+        """
+        Return a wrapper for the bound method that adds to the table entry
+        starting at base.
+        """
+        table = self.table
+        ticks_us = time.ticks_us
+        ticks_diff = time.ticks_diff
+
+        def hook(*args, **kwargs):
+            allocated = _mem_alloc()
+            start = ticks_us()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = ticks_diff(ticks_us(), start)
+                allocated = _mem_alloc() - allocated
+                table[base + _COUNT] += 1
+                table[base + _TIME_US] += elapsed
+                if allocated > 0:
+                    table[base + _ALLOCATED] += allocated
+
+        return hook
+
+    def attach(self, turtle):
+        """
+        Hook the methods of turtle, methods it does not have are skipped
+
+        Args:
+            turtle (TurtlePlot): turtle to instrument
+        """
+        for index, name in enumerate(self.hooks):
+            method = getattr(turtle, name, None)
+            if method is not None:
+                setattr(turtle, name, self._hook(method, index * _FIELDS))
+
+    def detach(self, turtle):
+        """
+        Remove the hooks from turtle, the table is kept
+
+        Args:
+            turtle (TurtlePlot): turtle to stop instrumenting
+        """
+        for name in self.hooks:
+            if name in turtle.__dict__:
+                delattr(turtle, name)
+
+    def rows(self):
+        """
+        Return the table as a list of (name, calls, us, bytes) tuples
+        """
+        table = self.table
+        return [
+            (name,) + tuple(table[index * _FIELDS:(index + 1) * _FIELDS])
+            for index, name in enumerate(self.hooks)]
+
+    def csv(self):
+        """
+        Return the table as CSV text with a header line
+
+        Returns:
+            str: one line per hook of name,calls,us,bytes
+        """
+        lines = [",".join(("name",) + _FIELD_NAMES)]
+        for row in self.rows():
+            lines.append("%s,%d,%d,%d" % row)
+
+        return "\n".join(lines) + "\n"
+
+    def json(self):
+        """
+        Return the table as JSON text
+
+        Returns:
+            str: object keyed by hook name of objects with calls, us and bytes
+        """
+        return ujson.dumps(
+            {row[0]: dict(zip(_FIELD_NAMES, row[1:])) for row in self.rows()})
+
+    def dump(self, filename):
+        """
+        Write the table to filename as JSON if it ends in .json otherwise
+        as CSV
+
+        Args:
+            filename (str): file to write
+        """
+        text = self.json() if filename.endswith(".json") else self.csv()
+        with open(filename, "w") as file:
+            file.write(text)
@@ -0,0 +1,382 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module launcher
+
+    Run programs from the /programs directory, each in its own namespace
+    so nothing a program creates stays on the heap after it exits.
+
+    Program titles, parameters and plot times are read from each program's
+    docstring without importing it and kept in an index file that is only
+    updated for programs that changed. The first line of the docstring is the
+    title, optional `Parameters:` and `Time:` lines list the parameters the
+    program asks for and the plot time at its default parameters::
+
+        '''
+        Draw a star from user provided values
+
+        Parameters: points, length
+        Time: 20 sec
+        '''
+
+    Programs ask for their parameters when they run, so the launcher can not
+    plot them on its own to time them. Measure the time by running the
+    program's drawing code on a `progress.Estimate`::
+
+        >>> estimate = progress.Estimate()
+        >>> star(estimate, 5, 20)
+        >>> estimate.time_ms()
+        18643
+
+    A program's source is compiled the first time it runs and the bytecode
+    saved with `marshal` to the `cache` directory inside /programs, keyed
+    on the source's modification time and size. Later runs load the saved
+    bytecode until the source changes, and the bytecode is freed when the
+    program exits rather than kept on the heap. Firmware without `marshal`
+    support for code objects, before MicroPython 1.23, compiles the source
+    on every run.
+
+    Programs compiled on a computer using `mpy-cross` can be copied to the
+    `mpy` directory inside /programs. A .mpy file is used instead of the
+    source if it was at least as new as the source when first run, and is
+    removed as stale once the source's modification time or size changes.
+
+"""
+
+# pylint: disable-msg=import-error
+import sys
+import gc
+import uos
+import ujson
+
+try:
+    import marshal
+except ImportError:
+    marshal = None
+
+_MPY_DIR = "mpy"            # directory of mpy-cross compiled programs
+_CACHE_DIR = "cache"        # directory of saved bytecode and .mpy keys
+_INDEX = "index.json"       # program metadata index file
+_LOG = "/memory.log"        # per run memory report log
+
+_STAMP = 0                  # index entry fields
+_TITLE = 1
+_PARAMETERS = 2
+_TIME = 3
+
+
+def largest_free():
+    """
+    Return the size of the largest block that can be allocated, found by
+    trying allocations. Collects garbage so callers should not hold
+    references to temporary objects.
+
+    Returns:
+        int: size of the largest free block in bytes
+    """
+    gc.collect()
+    low, high = 0, gc.mem_free()
+    while low < high:
+        size = (low + high + 1) // 2
+        try:
+            block = bytearray(size)
+            del block
+            low = size
+        except MemoryError:
+            high = size - 1
+        gc.collect()
+
+    return low
+
+
+class Launcher():
+    """
+    Program launcher
+
+    Args:
+        path (optional str): directory holding the programs, defaults to
+            "/programs"
+        log (optional str): file to append a memory report to after every
+            run, defaults to "/memory.log", None disables the log.
+
+    Each line of the memory log holds the program, free memory and largest
+    free block before the run, free memory and largest free block after the
+    run and the bytes lost by the run::
+
+        stars.py,81040,40960,80672,40960,368
+    """
+    def __init__(self, path="/programs", log=_LOG):
+        self.path = path
+        self.log = log
+        self.report = None
+        self._index = None
+
+    def programs(self):
+        """
+        Return the python programs that can be run
+
+        Returns:
+            list: file names of the programs
+        """
+        return sorted(name for name in uos.listdir(self.path) if name.endswith(".py"))
+
+    @staticmethod
+    def _describe(filename):
+        """
+        Read the title, parameters and time from the docstring of filename
+
+        Returns:
+            list: [title, parameters, time]
+        """
+        title = filename.rsplit("/", 1)[-1]
+        parameters = time = ""
+        quote = None
+        with open(filename) as source_file:
+            for line in source_file:
+                line = line.strip()
+                if quote is None:
+                    if not line or line[0] == "#":
+                        continue
+                    if line[:3] not in ('"""', "'''"):
+                        break
+                    quote = line[:3]
+                    line = line[3:]
+                    title = ""
+
+                done = quote in line
+                line = line.split(quote)[0].strip()
+                if line.startswith("Parameters:"):
+                    parameters = line[11:].strip()
+                elif line.startswith("Time:"):
+                    time = line[5:].strip()
+                elif line and not title:
+                    title = line
+
+                if done:
+                    break
+
+        return [title, parameters, time]
+
+    def index(self):
+        """
+        Return metadata for the programs that can be run, reading only the
+        programs that changed since the index was last updated.
+
+        Returns:
+            list: (program, title, parameters, time) tuples sorted by title
+        """
+        if self._index is None:
+            try:
+                with open("/".join((self.path, _INDEX))) as index_file:
+                    self._index = ujson.load(index_file)
+            except (OSError, ValueError):
+                self._index = {}
+
+        changed = False
+        programs = self.programs()
+        for program in [name for name in self._index if name not in programs]:
+            del self._index[program]
+            for extension in (".code", ".key"):
+                self._remove(self._cached(program.rsplit(".", 1)[0], extension))
+            changed = True
+
+        for program in programs:
+            filename = "/".join((self.path, program))
+            stamp = list(self._stamp(filename))
+            entry = self._index.get(program)
+            if entry is None or entry[_STAMP] != stamp:
+                self._index[program] = [stamp] + self._describe(filename)
+                changed = True
+
+        if changed:
+            with open("/".join((self.path, _INDEX)), "w") as index_file:
+                ujson.dump(self._index, index_file)
+
+        return sorted(
+            ((program, entry[_TITLE], entry[_PARAMETERS], entry[_TIME])
+             for program, entry in self._index.items()),
+            key=lambda item: item[1])
+
+    @staticmethod
+    def _stamp(filename):
+        """
+        Return the (modification time, size) of filename
+        """
+        stat = uos.stat(filename)
+        return (stat[8], stat[6])
+
+    def _cached(self, mod_name, extension):
+        """
+        Return the name of the cache file for mod_name with extension
+        """
+        return "".join((self.path, "/", _CACHE_DIR, "/", mod_name, extension))
+
+    @staticmethod
+    def _remove(filename):
+        """
+        Remove filename if it exists
+        """
+        try:
+            uos.remove(filename)
+        except OSError:
+            pass
+
+    def _save(self, filename, key, data=b""):
+        """
+        Write key and data to the cache file filename, creating the cache
+        directory if needed
+        """
+        try:
+            uos.mkdir("/".join((self.path, _CACHE_DIR)))
+        except OSError:
+            pass
+
+        with open(filename, "wb") as cache_file:
+            cache_file.write(key)
+            cache_file.write(data)
+
+    @staticmethod
+    def _key(*stamps):
+        """
+        Return the cache key line for stamps
+        """
+        return ",".join(str(value) for stamp in stamps for value in stamp).encode() + b"\n"
+
+    def _mpy(self, mod_name, stamp):
+        """
+        Return the name of the directory holding a current .mpy for mod_name
+        or None if there isn't one. Stale .mpy files are removed.
+        """
+        mpy_dir = "/".join((self.path, _MPY_DIR))
+        mpy_file = "".join((mpy_dir, "/", mod_name, ".mpy"))
+        try:
+            mpy_stamp = self._stamp(mpy_file)
+        except OSError:
+            return None
+
+        # the key holds the stamps of the .mpy and of the source it was first
+        # used with, the .mpy is stale once the source changes
+        key_file = self._cached(mod_name, ".key")
+        key = self._key(mpy_stamp, stamp)
+        try:
+            with open(key_file, "rb") as cache_file:
+                saved = cache_file.readline()
+        except OSError:
+            saved = b""
+
+        if saved.startswith(self._key(mpy_stamp)[:-1] + b","):
+            current = saved == key
+        else:
+            # a new .mpy, use it if it is at least as new as the source
+            current = mpy_stamp[0] >= stamp[0]
+            if current:
+                self._save(key_file, key)
+
+        if not current:
+            uos.remove(mpy_file)
+            self._remove(key_file)
+            return None
+
+        return mpy_dir
+
+    def _code(self, mod_name, filename, stamp):
+        """
+        Return the bytecode for filename, loading it from the cache if it was
+        compiled from the same source otherwise compiling and caching it
+        """
+        cache_file = self._cached(mod_name, ".code")
+        key = self._key(stamp)
+        if marshal is not None:
+            try:
+                with open(cache_file, "rb") as code_file:
+                    if code_file.readline() == key:
+                        return marshal.loads(code_file.read())
+            except (OSError, ValueError, EOFError):
+                pass
+
+        gc.collect()
+        with open(filename) as source_file:
+            code = compile(source_file.read(), filename, "exec")
+
+        if marshal is not None:
+            try:
+                data = marshal.dumps(code)
+            except ValueError:
+                # code objects can not be saved by this firmware
+                return code
+
+            self._save(cache_file, key, data)
+            del data
+
+        return code
+
+    def run(self, program):
+        """
+        Run a program in its own namespace. Modules the program imported are
+        unloaded when it exits so nothing it created stays on the heap, and a
+        memory report for the run is kept in `report` and appended to the log.
+
+        Args:
+            program (str): file name of the program in the programs directory
+        """
+        mod_name = program.rsplit(".", 1)[0]
+        filename = "/".join((self.path, program))
+        stamp = self._stamp(filename)
+
+        mpy_dir = self._mpy(mod_name, stamp)
+        code = None if mpy_dir is not None else self._code(mod_name, filename, stamp)
+
+        loaded = set(sys.modules)
+        sys.modules.pop(mod_name, None)
+        gc.collect()
+        before = (gc.mem_free(), largest_free())
+
+        namespace = {"__name__": mod_name}
+        try:
+            if mpy_dir is not None:
+                sys.path.insert(0, mpy_dir)
+                try:
+                    __import__(mod_name)
+                finally:
+                    sys.path.remove(mpy_dir)
+            else:
+                exec(code, namespace) # pylint: disable-msg=exec-used
+        finally:
+            namespace.clear()
+            for name in [name for name in sys.modules if name not in loaded]:
+                del sys.modules[name]
+
+            gc.collect()
+            after = (gc.mem_free(), largest_free())
+            self.report = (program,) + before + after
+            self._log()
+
+    def _log(self):
+        """
+        Append the last memory report to the log file
+        """
+        if self.log is None:
+            return
+
+        with open(self.log, "a") as log_file:
+            log_file.write("%s,%d,%d,%d,%d,%d\n" % (self.report + (self.report[1]-self.report[3],)))
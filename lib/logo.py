@@ -0,0 +1,538 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module logo
+
+    Run Logo programs on any TurtlePlot.
+
+    Example::
+
+        import logo
+
+        interpreter = logo.Logo(bot)
+        interpreter.run('''
+            TO star :size
+              REPEAT 5 [FD :size RT 144]
+            END
+            star 20
+        ''')
+
+    Source is compiled once into nested tuples of opcodes, procedures and
+    REPEAT bodies are not parsed again when they run. Compiled programs are
+    cached by their source, so running the same source again skips the
+    compile. Procedures defined by TO stay defined for later runs.
+
+    Supported words, case does not matter:
+
+    ======================== =============================================
+    Word                     Action
+    ======================== =============================================
+    FORWARD FD n             move forward n units
+    BACK BK n                move back n units
+    RIGHT RT n               turn right n degrees
+    LEFT LT n                turn left n degrees
+    PENUP PU, PENDOWN PD     raise or lower the pen
+    HOME                     move to 0, 0 and the starting heading
+    SETXY x y, SETX, SETY    move to a position
+    SETHEADING SETH n        set the heading
+    CIRCLE r                 draw a circle of radius r
+    REPEAT n [ ... ]         run the list n times, REPCOUNT is the count
+    IF c [ ... ]             run the list if c is true
+    IFELSE c [ ... ] [ ... ] run the first list if c is true else the second
+    MAKE "name n             set a variable, :name is its value
+    TO name :input ... END   define a procedure
+    STOP                     return from the current procedure
+    ======================== =============================================
+
+    Expressions use + - * / and the comparisons < > =, with the reporters
+    SQRT, SIN, COS, ABS, XCOR, YCOR, HEADING and REPCOUNT. As in other
+    Logos a - with a space before it and a digit after it is a negative
+    number, so SETXY 5 -5 has two inputs and 5 - 5 or 5-5 is zero.
+    Comments start with ; and run to the end of the line. Put the turtle
+    in "logo" mode for Logo headings, north at 0 and clockwise.
+
+    Procedures are called using Python recursion so recursive procedures
+    are limited by MicroPython's stack, a few dozen calls deep.
+
+"""
+
+# pylint: disable-msg=import-error
+import math
+
+# pylint: disable-msg=invalid-name
+const = lambda x: x
+
+_PRIM = const(0)            # statement opcodes
+_REPEAT = const(1)
+_IF = const(2)
+_CALL = const(3)
+_STOP = const(4)
+_MAKE = const(5)
+
+_VAR = const(0)             # expression opcodes, numbers are floats
+_BINARY = const(1)
+_NEGATE = const(2)
+_FUNC = const(3)
+_QUERY = const(4)
+_REPCOUNT = const(5)
+
+# command: (turtle method, inputs)
+_COMMANDS = {
+    "FORWARD": ("forward", 1), "FD": ("forward", 1),
+    "BACK": ("back", 1), "BK": ("back", 1),
+    "RIGHT": ("right", 1), "RT": ("right", 1),
+    "LEFT": ("left", 1), "LT": ("left", 1),
+    "PENUP": ("penup", 0), "PU": ("penup", 0),
+    "PENDOWN": ("pendown", 0), "PD": ("pendown", 0),
+    "HOME": ("home", 0),
+    "SETXY": ("goto", 2),
+    "SETX": ("setx", 1),
+    "SETY": ("sety", 1),
+    "SETHEADING": ("setheading", 1), "SETH": ("setheading", 1),
+    "CIRCLE": ("circle", 1)}
+
+# reporter: (function, inputs)
+_FUNCTIONS = {
+    "SQRT": (math.sqrt, 1),
+    "SIN": (lambda angle: math.sin(math.radians(angle)), 1),
+    "COS": (lambda angle: math.cos(math.radians(angle)), 1),
+    "ABS": (abs, 1)}
+
+# reporter: turtle method
+_QUERIES = {"XCOR": "xcor", "YCOR": "ycor", "HEADING": "heading"}
+
+_OPERATORS = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": lambda a, b: a / b,
+    "<": lambda a, b: float(a < b),
+    ">": lambda a, b: float(a > b),
+    "=": lambda a, b: float(a == b)}
+
+_COMPARISONS = "<>="
+_SUMS = "+-"
+_PRODUCTS = "*/"
+_SINGLE = "[]()+-*/<>="
+
+
+class LogoError(Exception):
+    """
+    Raised for Logo syntax errors and run time errors
+    """
+
+
+def _negative(source, index):
+    """
+    Return True if the - at index starts a negative number
+    """
+    if source[index] != "-" or index + 1 == len(source):
+        return False
+    if index and not (source[index - 1].isspace() or source[index - 1] in "[("):
+        return False
+    after = source[index + 1]
+    return after.isdigit() or (
+        after == "." and index + 2 < len(source) and source[index + 2].isdigit())
+
+
+def tokenize(source):
+    """
+    Split Logo source into a list of upper case words, numbers and
+    punctuation, dropping comments.
+
+    Args:
+        source (str): Logo source
+
+    Returns:
+        list: tokens, numbers as floats
+
+    A - after a space, [ or ( and directly before a digit is the sign of
+    a negative number, otherwise it is subtraction::
+
+        >>> tokenize("SETXY 5 -5")
+        ['SETXY', 5.0, -5.0]
+        >>> tokenize("SETXY -10 -20")
+        ['SETXY', -10.0, -20.0]
+        >>> tokenize("FD 10-5 FD 10 - 5")
+        ['FD', 10.0, '-', 5.0, 'FD', 10.0, '-', 5.0]
+    """
+    tokens = []
+    index = 0
+    length = len(source)
+    while index < length:
+        char = source[index]
+        if char.isspace():
+            index += 1
+        elif char == ";":
+            while index < length and source[index] != "\n":
+                index += 1
+        elif char in _SINGLE and not _negative(source, index):
+            tokens.append(char)
+            index += 1
+        else:
+            start = index
+            index += 1
+            while index < length and not source[index].isspace() \
+                    and source[index] not in _SINGLE and source[index] != ";":
+                index += 1
+            word = source[start:index]
+            try:
+                tokens.append(float(word))
+            except ValueError:
+                tokens.append(word.upper())
+
+    return tokens
+
+
+class Program():
+    """
+    A compiled Logo program
+
+    Args:
+        procedures (dict): name: (input names, body) of the procedures it
+            defines
+        body (tuple): statements to run
+    """
+    def __init__(self, procedures, body):
+        self.procedures = procedures
+        self.body = body
+
+
+class _Compiler():
+    """
+    Compile a token list into a `Program`
+
+    Args:
+        tokens (list): tokens from `tokenize`
+        arities (dict): name: inputs of procedures already defined
+    """
+    def __init__(self, tokens, arities):
+        self.tokens = tokens
+        self.index = 0
+        self.arities = dict(arities)
+        self._scan()
+
+    def _scan(self):
+        """
+        Find the number of inputs of each procedure defined in the source
+        so calls can be compiled before the definition.
+        """
+        tokens = self.tokens
+        for index, token in enumerate(tokens):
+            if token == "TO" and index + 1 < len(tokens):
+                count = 0
+                after = index + 2
+                while after < len(tokens) and isinstance(tokens[after], str) \
+                        and tokens[after].startswith(":"):
+                    count += 1
+                    after += 1
+                self.arities[tokens[index + 1]] = count
+
+    def _peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def _operator(self, operators):
+        """
+        Return the next token if it is one of operators otherwise None
+        """
+        token = self._peek()
+        if isinstance(token, str) and len(token) == 1 and token in operators:
+            return token
+        return None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise LogoError("unexpected end of program")
+        self.index += 1
+        return token
+
+    def _expect(self, expected):
+        token = self._next()
+        if token != expected:
+            raise LogoError("expected %s not %s" % (expected, token))
+
+    def program(self):
+        """
+        Compile the whole token list
+
+        Returns:
+            Program: the compiled program
+        """
+        procedures = {}
+        body = []
+        while self._peek() is not None:
+            if self._peek() == "TO":
+                self._next()
+                name = self._next()
+                inputs = []
+                while isinstance(self._peek(), str) and self._peek().startswith(":"):
+                    inputs.append(self._next()[1:])
+                procedures[name] = (tuple(inputs), self._block("END"))
+            else:
+                body.append(self._statement())
+
+        return Program(procedures, tuple(body))
+
+    def _block(self, end):
+        """
+        Compile statements up to the end token
+        """
+        statements = []
+        while self._peek() != end:
+            if self._peek() is None:
+                raise LogoError("missing %s" % end)
+            statements.append(self._statement())
+        self._next()
+        return tuple(statements)
+
+    def _list(self):
+        """
+        Compile a bracketed list of statements
+        """
+        self._expect("[")
+        return self._block("]")
+
+    def _inputs(self, count):
+        return tuple(self._expression() for _ in range(count))
+
+    def _statement(self):
+        """
+        Compile one statement
+        """
+        word = self._next()
+        if word == "REPEAT":
+            return (_REPEAT, self._expression(), self._list())
+        if word == "IF":
+            return (_IF, self._expression(), self._list(), ())
+        if word == "IFELSE":
+            return (_IF, self._expression(), self._list(), self._list())
+        if word == "STOP":
+            return (_STOP,)
+        if word == "MAKE":
+            name = self._next()
+            if not isinstance(name, str) or not name.startswith('"'):
+                raise LogoError("MAKE needs a quoted name not %s" % name)
+            return (_MAKE, name[1:], self._expression())
+        if word in _COMMANDS:
+            method, count = _COMMANDS[word]
+            return (_PRIM, method, self._inputs(count))
+        if word in self.arities:
+            return (_CALL, word, self._inputs(self.arities[word]))
+
+        raise LogoError("I don't know how to %s" % word)
+
+    def _expression(self):
+        result = self._sum()
+        while self._operator(_COMPARISONS):
+            operator = _OPERATORS[self._next()]
+            result = (_BINARY, operator, result, self._sum())
+        return result
+
+    def _sum(self):
+        result = self._product()
+        while self._operator(_SUMS):
+            operator = _OPERATORS[self._next()]
+            result = (_BINARY, operator, result, self._product())
+        return result
+
+    def _product(self):
+        result = self._primary()
+        while self._operator(_PRODUCTS):
+            operator = _OPERATORS[self._next()]
+            result = (_BINARY, operator, result, self._primary())
+        return result
+
+    def _primary(self):
+        token = self._next()
+        if isinstance(token, float):
+            return token
+        if token == "-":
+            operand = self._primary()
+            return -operand if isinstance(operand, float) else (_NEGATE, operand)
+        if token == "(":
+            result = self._expression()
+            self._expect(")")
+            return result
+        if token.startswith(":"):
+            return (_VAR, token[1:])
+        if token == "REPCOUNT":
+            return (_REPCOUNT,)
+        if token in _QUERIES:
+            return (_QUERY, _QUERIES[token])
+        if token in _FUNCTIONS:
+            function, count = _FUNCTIONS[token]
+            return (_FUNC, function, self._inputs(count))
+
+        raise LogoError("expected a value not %s" % token)
+
+
+def compile_logo(source, arities=None):
+    """
+    Compile Logo source
+
+    Args:
+        source (str): Logo source
+        arities (optional dict): name: inputs of procedures defined elsewhere
+            that the source may call
+
+    Returns:
+        Program: the compiled program
+    """
+    return _Compiler(tokenize(source), arities or {}).program()
+
+
+class Logo():
+    """
+    Logo interpreter for a TurtlePlot
+
+    Args:
+        turtle (TurtlePlot): turtle to draw with
+    """
+    def __init__(self, turtle):
+        self.turtle = turtle
+        self.procedures = {}
+        self.variables = {}
+        self._cache = {}
+        self._methods = {}
+        self._counts = []
+
+    def compile(self, source):
+        """
+        Return the compiled program for source, compiling it if it is not
+        in the cache.
+
+        Args:
+            source (str): Logo source
+
+        Returns:
+            Program: the compiled program
+        """
+        program = self._cache.get(source)
+        if program is None:
+            arities = {name: len(procedure[0]) for name, procedure in self.procedures.items()}
+            program = compile_logo(source, arities)
+            self._cache[source] = program
+
+        return program
+
+    def clear_cache(self):
+        """
+        Discard the cached programs
+        """
+        self._cache = {}
+
+    def run(self, program):
+        """
+        Define the procedures of a program and run its statements
+
+        Args:
+            program (str or Program): Logo source or a compiled program
+        """
+        if isinstance(program, str):
+            program = self.compile(program)
+
+        turtle = self.turtle
+        self._methods = {
+            method: getattr(turtle, method)
+            for method in [command[0] for command in _COMMANDS.values()] + list(_QUERIES.values())}
+        self.procedures.update(program.procedures)
+        self._counts = []
+        self._execute(program.body, self.variables)
+
+    def _execute(self, block, frame):
+        """
+        Run a block of statements
+
+        Returns:
+            bool: True if STOP was run
+        """
+        for statement in block:
+            opcode = statement[0]
+            if opcode == _PRIM:
+                self._methods[statement[1]](*[self._value(item, frame) for item in statement[2]])
+            elif opcode == _REPEAT:
+                counts = self._counts
+                counts.append(0)
+                try:
+                    for count in range(int(self._value(statement[1], frame))):
+                        counts[-1] = count + 1
+                        if self._execute(statement[2], frame):
+                            return True
+                finally:
+                    counts.pop()
+            elif opcode == _IF:
+                taken = statement[2] if self._value(statement[1], frame) else statement[3]
+                if self._execute(taken, frame):
+                    return True
+            elif opcode == _CALL:
+                self._call(statement[1], [self._value(item, frame) for item in statement[2]])
+            elif opcode == _STOP:
+                return True
+            elif opcode == _MAKE:
+                name = statement[1]
+                target = frame if name in frame else self.variables
+                target[name] = self._value(statement[2], frame)
+
+        return False
+
+    def _call(self, name, values):
+        """
+        Run procedure name with its inputs set to values
+        """
+        procedure = self.procedures.get(name)
+        if procedure is None:
+            raise LogoError("I don't know how to %s" % name)
+
+        inputs, body = procedure
+        if len(inputs) != len(values):
+            raise LogoError("%s needs %d inputs" % (name, len(inputs)))
+
+        self._execute(body, dict(zip(inputs, values)))
+
+    def _value(self, item, frame):
+        """
+        Return the value of a compiled expression
+        """
+        if isinstance(item, float):
+            return item
+
+        opcode = item[0]
+        if opcode == _VAR:
+            name = item[1]
+            if name in frame:
+                return frame[name]
+            if name in self.variables:
+                return self.variables[name]
+            raise LogoError("%s has no value" % name)
+        if opcode == _BINARY:
+            return item[1](self._value(item[2], frame), self._value(item[3], frame))
+        if opcode == _NEGATE:
+            return -self._value(item[1], frame)
+        if opcode == _FUNC:
+            return item[1](*[self._value(value, frame) for value in item[2]])
+        if opcode == _QUERY:
+            return self._methods[item[1]]()
+        if not self._counts:
+            raise LogoError("REPCOUNT outside REPEAT")
+        return float(self._counts[-1])
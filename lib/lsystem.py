@@ -0,0 +1,216 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module lsystem
+
+    Draw L-system fractals without expanding them into strings.
+
+    Example::
+
+        import lsystem
+
+        lsystem.KOCH.draw(bot, 4, 2)
+
+        dragon = lsystem.LSystem("F", {"F": "F+G", "G": "F-G"}, 90, draw="FG")
+        dragon.draw(bot, 10, 3)
+
+    The rules are applied as the symbols are needed, keeping one position
+    for each level of expansion, so memory use grows with the depth rather
+    than with the length of the expanded string. Moves in the same
+    direction and turns with no move between them are merged before they
+    reach the turtle, so "F+-F" is a single forward and "FF" one move of
+    twice the length.
+
+    ======= ===============================================
+    Symbol  Action
+    ======= ===============================================
+    draw    forward one length with the pen down, "F"
+    move    forward one length with the pen up, "f"
+    \\+      turn left by the angle
+    \\-      turn right by the angle
+    \\|      turn around
+    [       save the position and heading
+    ]       return to the last saved position and heading
+    ======= ===============================================
+
+    Other symbols only take part in the rules.
+
+"""
+
+# pylint: disable-msg=import-error
+from array import array
+
+# pylint: disable-msg=invalid-name
+const = lambda x: x
+
+FORWARD = const(0)          # command opcodes from `LSystem.commands`
+TURN = const(1)
+PEN = const(2)
+PUSH = const(3)
+POP = const(4)
+
+
+class LSystem():
+    """
+    An L-system
+
+    Args:
+        axiom (str): starting symbols
+        rules (dict): symbol: replacement symbols
+        angle (float): angle units turned by + and -
+        draw (optional str): symbols that draw, defaults to "F"
+        move (optional str): symbols that move without drawing, defaults to "f"
+    """
+    def __init__(self, axiom, rules, angle, draw="F", move="f"):
+        self.axiom = axiom
+        self.rules = rules
+        self.angle = angle
+        self.draw_symbols = draw
+        self.move_symbols = move
+
+    def symbols(self, depth):
+        """
+        Generate the symbols of the L-system after depth expansions
+
+        Args:
+            depth (int): times to apply the rules
+
+        Yields:
+            str: each symbol of the expanded string in order
+        """
+        rules = self.rules
+        texts = [self.axiom] + [None] * depth
+        positions = array("i", [0] * (depth + 1))
+        level = 0
+        while level >= 0:
+            text = texts[level]
+            position = positions[level]
+            if position == len(text):
+                texts[level] = None
+                level -= 1
+                continue
+
+            positions[level] = position + 1
+            symbol = text[position]
+            if level < depth and symbol in rules:
+                level += 1
+                texts[level] = rules[symbol]
+                positions[level] = 0
+            else:
+                yield symbol
+
+    def commands(self, depth, length):
+        """
+        Generate the merged turtle commands of the L-system after depth
+        expansions
+
+        Args:
+            depth (int): times to apply the rules
+            length (float): distance moved by a draw or move symbol
+
+        Yields:
+            tuple: (FORWARD, distance), (TURN, angle to the left),
+                (PEN, True for down), (PUSH, None) or (POP, None)
+        """
+        draw_symbols = self.draw_symbols
+        move_symbols = self.move_symbols
+        angle = self.angle
+        distance = 0.0
+        turn = 0.0
+        down = None
+
+        for symbol in self.symbols(depth):
+            if symbol in draw_symbols or symbol in move_symbols:
+                drawing = symbol in draw_symbols
+                if turn or drawing != down:
+                    if distance:
+                        yield (FORWARD, distance)
+                        distance = 0.0
+                    if turn:
+                        yield (TURN, turn)
+                        turn = 0.0
+                    if drawing != down:
+                        down = drawing
+                        yield (PEN, down)
+                distance += length
+            elif symbol == "+":
+                turn += angle
+            elif symbol == "-":
+                turn -= angle
+            elif symbol == "|":
+                turn += 180.0
+            elif symbol in "[]":
+                if distance:
+                    yield (FORWARD, distance)
+                    distance = 0.0
+                if turn:
+                    yield (TURN, turn)
+                    turn = 0.0
+                if symbol == "[":
+                    yield (PUSH, None)
+                else:
+                    down = None
+                    yield (POP, None)
+
+        if distance:
+            yield (FORWARD, distance)
+        if turn:
+            yield (TURN, turn)
+
+    def draw(self, turtle, depth, length):
+        """
+        Draw the L-system after depth expansions, leaving the pen up
+
+        Args:
+            turtle (TurtlePlot): turtle to draw with
+            depth (int): times to apply the rules
+            length (float): distance moved by a draw or move symbol
+        """
+        saved = []
+        for opcode, value in self.commands(depth, length):
+            if opcode == FORWARD:
+                turtle.forward(value)
+            elif opcode == TURN:
+                turtle.left(value)
+            elif opcode == PEN:
+                if value:
+                    turtle.pendown()
+                else:
+                    turtle.penup()
+            elif opcode == PUSH:
+                saved.append((turtle.pos(), turtle.heading()))
+            else:
+                position, heading = saved.pop()
+                turtle.penup()
+                turtle.goto(position)
+                turtle.setheading(heading)
+
+        turtle.penup()
+
+
+KOCH = LSystem("F", {"F": "F+F--F+F"}, 60)
+SNOWFLAKE = LSystem("F--F--F", {"F": "F+F--F+F"}, 60)
+HILBERT = LSystem("A", {"A": "+BF-AFA-FB+", "B": "-AF+BFB+FA-"}, 90)
+DRAGON = LSystem("F", {"F": "F+G", "G": "F-G"}, 90, draw="FG")
+SIERPINSKI = LSystem("A", {"A": "B-A-B", "B": "A+B+A"}, 60, draw="AB")
+PLANT = LSystem("X", {"X": "F+[[X]-X]-F[-FX]+X", "F": "FF"}, 25)
@@ -26,22 +26,12 @@
 #pylint: disable-msg=import-error
 import time
 import sys
-import gc
 import network
-import uos
+import button
 import oledui
+import launcher
 
-def reload(mod):
-    """
-    reload: Removes a module and re-imports allowing you to re-run programs
-
-    Args:
-        mod (str): Name of module to reload
-    """
-    mod_name = mod.__name__
-    del sys.modules[mod_name]
-    gc.collect()
-    return __import__(mod_name)
+LAUNCHER = launcher.Launcher()
 
 def connect_ap(uio):
     """
@@ -147,8 +137,7 @@ def enable_ap(uio):
                 essid=ap_name.encode(),
                 password=ap_pass.encode(),
                 authmode=network.AUTH_WPA_WPA2_PSK)
-            uio.put(b'AP_NAME', ap_name)
-            uio.put(b'AP_PASS', ap_pass)
+            uio.update({b'AP_NAME': ap_name, b'AP_PASS': ap_pass})
         else:
             sta_ap.config(essid=ap_name, authmode=network.AUTH_OPEN)
             uio.put(b'AP_NAME', ap_name)
@@ -178,19 +167,46 @@ def disable_ap(uio):
     sta_ap.active(False)
     uio.wait("Press to Continue", 7)
 
+def _program_text(uio, program):
+    """
+    Return the menu text for a program, its title with its plot time on the
+    right if it has one
+    """
+    title, plot_time = program[1], program[3]
+    if not plot_time:
+        return title[:uio.max_chars]
+
+    width = uio.max_chars - len(plot_time) - 1
+    return title[:width].ljust(width) + " " + plot_time
+
+def _program_details(uio, program):
+    """
+    Show a program's title, parameters and plot time
+
+    Returns:
+        bool: True if the user chose to run the program, False if LEFT was
+            pressed
+    """
+    uio.cls(program[1][:uio.max_chars], 0, True)
+    if program[2]:
+        uio.center("Parameters:", 2)
+        uio.center(program[2][:uio.max_chars], 3)
+    if program[3]:
+        uio.center("Time: " + program[3], 5)
+
+    return uio.wait("Press to Run", 7) not in (button.LEFT, -button.LEFT)
+
 def run_program(uio):
     """
-    show list of python programs and allow user to select one to run
+    show list of python programs with their plot times, then the selected
+    program's parameters, and run it
     """
-    programs = uos.listdir("/programs")
-    program = 0
-    program = uio.menu("Run Program", programs, program)
-    if program is not None:
-        mod_name = "".join(programs[program].split(".")[:-1])
-        if mod_name in sys.modules:
-            reload(sys.modules[mod_name])
-        else:
-            __import__(mod_name)
+    programs = LAUNCHER.index()
+    items = [(program[0], _program_text(uio, program)) for program in programs]
+    program = uio.menu("Run Program", items, 0, 1)
+    if program is not None and _program_details(uio, programs[program]):
+        uio.flush()
+        LAUNCHER.run(programs[program][0])
 
 def main_menu(uio):
     """
@@ -217,6 +233,7 @@ def main_menu(uio):
             uio.center("REPL", 3)
             uio.center("Press to", 5)
             uio.wait("Continue", 6)
+            uio.flush()
             uio.fill(uio.background)
             uio.show()
             break
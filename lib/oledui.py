@@ -28,17 +28,20 @@ ui.py - UI for OLED and 5 way button
 from machine import I2C, Pin
 import ssd1306
 import button
-import btree
+import config
 
 # pylint: disable-msg=invalid-name
 const = lambda x: x
 
+_SET_COL_ADDR = const(0x21)     # SSD1306 set column address command
+_SET_PAGE_ADDR = const(0x22)    # SSD1306 set page address command
+
 # pylint: disable-msg=too-many-instance-attributes
 class UI:
     """
     UI MicroPython OLED user interface class using JoyStick
     """
-    def __init__(self):
+    def __init__(self, joystick=None):
 
         # init i2c oled
         Pin(16, Pin.OUT).value(1)
@@ -51,15 +54,99 @@ class UI:
                 freq=450000),
             addr=0x3c)
 
-        self.fill = self.display.fill
-        self.show = self.display.show
+        self.pages = self.display.height // 8
+        self._dirty_lo = bytearray(b'\xff' * self.pages)
+        self._dirty_hi = bytearray(self.pages)
+        self.refresh_bytes = 0
+        self.rows_drawn = 0
         self.font_width = 8
         self.font_height = 8
         self.max_chars = self.display.width // self.font_width
         self.max_lines = self.display.height // self.font_height
         self.foreground = 1
         self.background = 0
-        self.joystick = button.JoyStick()
+        self.joystick = button.JoyStick() if joystick is None else joystick
+
+    def _run(self, task):
+        """
+        Run a UI generator to completion, reading the joystick each time it
+        yields.
+
+        Args:
+            task (generator): UI generator to run
+
+        Returns:
+            the generator's return value
+        """
+        try:
+            wait = next(task)
+            while True:
+                wait = task.send(self.joystick.read(wait))
+        except StopIteration as result:
+            return result.value
+
+    def _dirty(self, x, y, width, height):
+        """
+        Mark a rectangle of the display as changed since the last `show`
+
+        Args:
+            x (int): left column of rectangle
+            y (int): top row of rectangle
+            width (int): width of rectangle in pixels
+            height (int): height of rectangle in pixels
+        """
+        first = max(x, 0)
+        last = min(x + width, self.display.width) - 1
+        if first > last or height <= 0:
+            return
+
+        for page in range(max(y, 0) // 8, min((y + height - 1) // 8, self.pages - 1) + 1):
+            if first < self._dirty_lo[page]:
+                self._dirty_lo[page] = first
+            if last > self._dirty_hi[page]:
+                self._dirty_hi[page] = last
+
+    def fill(self, color):
+        """
+        Fill the entire display with color
+
+        Args:
+            color (int): color to fill the display with
+        """
+        self.display.fill(color)
+        self._dirty(0, 0, self.display.width, self.display.height)
+
+    def show(self, full=False):
+        """
+        Send the changed parts of the display buffer to the display. Only the
+        columns that changed in each page are sent using the SSD1306 page and
+        column addressing.
+
+        Args:
+            full (optional bool): send the entire buffer, use after drawing
+                directly on `display`
+        """
+        display = self.display
+        width = display.width
+        if full:
+            self._dirty(0, 0, width, display.height)
+
+        offset = 32 if width == 64 else 0
+        buffer = memoryview(display.buffer)
+        for page in range(self.pages):
+            first = self._dirty_lo[page]
+            last = self._dirty_hi[page]
+            if first <= last:
+                display.write_cmd(_SET_COL_ADDR)
+                display.write_cmd(first + offset)
+                display.write_cmd(last + offset)
+                display.write_cmd(_SET_PAGE_ADDR)
+                display.write_cmd(page)
+                display.write_cmd(page)
+                display.write_data(buffer[page*width+first:page*width+last+1])
+                self.refresh_bytes += last - first + 1
+                self._dirty_lo[page] = 0xff
+                self._dirty_hi[page] = 0
 
     @staticmethod
     def _screen_shot(uio, *_):
@@ -91,8 +178,10 @@ class UI:
             print("END", file=output)
         print("done.")
 
-    @staticmethod
-    def get(cfg_name):
+    cfg = config.Config()
+
+    @classmethod
+    def get(cls, cfg_name):
         """
         get: get config setting from btree ui.cfg file if one exists
 
@@ -102,51 +191,36 @@ class UI:
         Returns:
             (string): value of setting
         """
-        name = cfg_name.encode() if isinstance(cfg_name, str) else cfg_name
-        try:
-            cfg_file = open("ui.cfg", "r+b")
-        except OSError:
-            cfg_file = open("ui.cfg", "w+b")
+        return cls.cfg.get(cfg_name).decode()
 
-        cfg_db = btree.open(cfg_file)
-        try:
-            cfg_value = cfg_db[name]
-        except KeyError:
-            cfg_value = b''
-
-        cfg_db.close()
-        cfg_file.close()
-
-        return cfg_value.decode()
-
-    @staticmethod
-    def put(cfg_name, cfg_value):
+    @classmethod
+    def put(cls, cfg_name, cfg_value):
         """
-        put: put config setting into btree ui.cfg file
+        put: put config setting into btree ui.cfg file. The file is written
+        shortly after the last change or when `flush` is called.
 
         Args:
             cfg_name ([str, bytes, bytearray]): name of setting to store
             cfg_value ([str, bytes, bytearray]): value of setting to store
         """
-        if isinstance(cfg_name, str):
-            name = cfg_name.encode()
-        else:
-            name = cfg_name
+        cls.cfg.put(cfg_name, cfg_value)
 
-        if isinstance(cfg_value, str):
-            value = cfg_value.encode()
-        else:
-            value = cfg_value
+    @classmethod
+    def update(cls, settings):
+        """
+        update: put several config settings into btree ui.cfg file at once
 
-        try:
-            cfg_file = open("ui.cfg", "r+b")
-        except OSError:
-            cfg_file = open("ui.cfg", "w+b")
+        Args:
+            settings (dict): setting names and values to store
+        """
+        cls.cfg.update(settings)
 
-        cfg_db = btree.open(cfg_file)
-        cfg_db[name] = value
-        cfg_db.close()
-        cfg_file.close()
+    @classmethod
+    def flush(cls):
+        """
+        flush: write any pending config settings to btree ui.cfg file
+        """
+        cls.cfg.flush()
 
     def setcolors(self, foreground=1, background=0):
         """
@@ -214,6 +288,11 @@ class UI:
                             to_y = pos_y + vector_y
 
                             self.display.line(from_x, from_y, to_x, to_y, 1)
+                            self._dirty(
+                                min(from_x, to_x),
+                                min(from_y, to_y),
+                                abs(to_x - from_x) + 1,
+                                abs(to_y - from_y) + 1)
 
                             from_x = to_x
                             from_y = to_y
@@ -245,6 +324,7 @@ class UI:
             self.foreground if reverse else self.background)
 
         self.display.text(chr(char), x_offset, y_offset, color)
+        self._dirty(x_offset, y_offset, self.font_width, self.font_height)
         self.show()
 
     def write(self, txt, line, col=0, reverse=False):
@@ -272,6 +352,8 @@ class UI:
             y_offset,
             self.background if reverse else self.foreground)
 
+        self._dirty(x_offset, y_offset, self.font_width*len(txt), self.font_height)
+
     def writeln(self, txt, line, col=0, reverse=False):
         """
         Set the entire line of the display to the background color then write
@@ -294,6 +376,7 @@ class UI:
             self.foreground if reverse else self.background)
 
         self.display.text(txt, x_offset, y_offset, color)
+        self._dirty(0, y_offset, self.display.width, self.font_height)
 
     def center(self, txt, line, reverse=False):
         """
@@ -335,10 +418,18 @@ class UI:
         Returns:
             int: button pressed
 
+        """
+        return self._run(self._wait_task(text, line, reverse))
+
+    def _wait_task(self, text, line, reverse=False):
+        """
+        wait generator, yields the ms to wait for a button press
+        and is sent the button that was read.
         """
         self.center(text, line, reverse)
         self.show()
-        return self.joystick.read()
+        btn = yield 0
+        return btn
 
     def underline(self, line, col, width, reverse=False):
         """
@@ -350,12 +441,25 @@ class UI:
             width (int): number of underlines to draw
             reverse (optional bool): true reverse forground and background colors
         """
-        self.display.hline(
+        self._hline(
             col*self.font_height,
             (line+1)*self.font_height-1,
             width*self.font_width,
             self.background if reverse else self.foreground)
 
+    def _hline(self, x, y, width, color):
+        """
+        _hline - draw a horizontal line and mark it as changed
+
+        Args:
+            x (int): column to start at
+            y (int): row to draw on
+            width (int): length of the line in pixels
+            color (int): color of the line
+        """
+        self.display.hline(x, y, width, color)
+        self._dirty(x, y, width, 1)
+
     def menu(self, title, menu, active=None, menu_text=None):
         """
         show menu and return user selection
@@ -379,6 +483,9 @@ class UI:
             The index number of the option that was selected or None if
             the right button was pressed.
 
+        The number of menu lines drawn for the last frame is kept in
+        `rows_drawn`.
+
         Example::
 
             main_menu =[
@@ -402,6 +509,13 @@ class UI:
             connect = ui.menu("Select AP", scan, connect, 0)
 
 
+        """
+        return self._run(self._menu_task(title, menu, active, menu_text))
+
+    def _menu_task(self, title, menu, active=None, menu_text=None):
+        """
+        menu generator, yields the ms to wait for a button press
+        and is sent the button that was read.
         """
         menu_count = len(menu)
 
@@ -412,21 +526,33 @@ class UI:
         self.cls(title, 0, True)
         self.underline(0, 0, self.max_chars, True)
 
-        # display the menu on line 2 thru max_lines-1
+        # display the menu on line 2 thru max_lines-1, repainting every line
+        # only when the page scrolls, otherwise just the lines that changed
+        page_shown = None
+        previous = current
         while True:
-            for line in range(self.max_lines-1):
-                menu_item = first_shown + line
-                if menu_item < menu_count:
-                    self.writeln(
-                        menu[menu_item] if menu_text is None
-                        else menu[menu_item][menu_text],
-                        line+1,
-                        0,
-                        menu_item == current)
+            if first_shown != page_shown:
+                lines = range(first_shown, min(first_shown+self.max_lines-1, menu_count))
+                page_shown = first_shown
+            elif previous != current:
+                lines = (previous, current)
+            else:
+                lines = ()
+
+            for menu_item in lines:
+                self.writeln(
+                    menu[menu_item] if menu_text is None
+                    else menu[menu_item][menu_text],
+                    menu_item-first_shown+1,
+                    0,
+                    menu_item == current)
+
+            self.rows_drawn = len(lines)
             self.show()
+            previous = current
 
             # wait for button to be pressed and released
-            btn = self.joystick.read()
+            btn = yield 0
 
             # move up one menu item if possible
             if btn == button.UP:
@@ -494,6 +620,13 @@ class UI:
         DOWN   Jumps to previous character in the set " 0Aa"
         ====== =============================================
 
+        """
+        return self._run(self._string_task(line, column, max_length, value, valid))
+
+    def _string_task(self, line, column, max_length, value, valid=None):
+        """
+        string generator, yields the ms to wait for a button press
+        and is sent the button that was read.
         """
         if isinstance(value, (int, float)):
             value = str(value)
@@ -530,7 +663,7 @@ class UI:
         cursor_y = (line+1)*self.font_height-1
         cursor_x = (current+column)*self.font_width
 
-        self.display.hline(
+        self._hline(
             cursor_x,
             cursor_y,
             max_length*self.font_width,
@@ -540,7 +673,7 @@ class UI:
         blink = False
         while True:
             # wait for button to be pressed and released
-            btn = self.joystick.read(250)
+            btn = yield 250
 
             if btn == button.DOWN:
                 jump = 0
@@ -561,7 +694,7 @@ class UI:
             elif btn == button.LEFT:
                 jump = 0
                 if current > 0:
-                    self.display.hline(
+                    self._hline(
                         cursor_x,
                         cursor_y,
                         self.font_width,
@@ -584,7 +717,7 @@ class UI:
             elif btn == button.RIGHT:
                 jump = 0
                 if current < length and current < max_length-1:
-                    self.display.hline(
+                    self._hline(
                         cursor_x,
                         cursor_y,
                         self.font_width,
@@ -628,7 +761,7 @@ class UI:
                 line,
                 current+column)
 
-            self.display.hline(
+            self._hline(
                 cursor_x,
                 cursor_y,
                 self.font_width,
@@ -673,9 +806,16 @@ class UI:
         CENTER exits field editing
         ====== =============================================
 
+        """
+        return self._run(self._integer_task(line, column, max_length, value))
+
+    def _integer_task(self, line, column, max_length, value):
+        """
+        integer generator, yields the ms to wait for a button press
+        and is sent the button that was read.
         """
         temp = str(value)
-        status, temp = self.string(line, column, max_length, temp, " 0123456789")
+        status, temp = yield from self._string_task(line, column, max_length, temp, " 0123456789")
         return (status, int(temp))
 
     def select(self, line, column, options, value):
@@ -713,6 +853,13 @@ class UI:
         CENTER exits selection field
         ====== ==========================================
 
+        """
+        return self._run(self._select_task(line, column, options, value))
+
+    def _select_task(self, line, column, options, value):
+        """
+        select generator, yields the ms to wait for a button press
+        and is sent the button that was read.
         """
         btn = 0
         option_count = len(options)
@@ -729,7 +876,7 @@ class UI:
 
             self.show()
 
-            btn = self.joystick.read()
+            btn = yield 0
 
             if btn == button.LEFT:
                 value -= 1
@@ -778,7 +925,7 @@ class UI:
             self.underline(line, column, max_length)
             return True
 
-        return self.string(line, column, max_length, text)
+        return self._string_task(line, column, max_length, text)
 
     def _integer(self, init, params):
         """
@@ -793,7 +940,7 @@ class UI:
             self.underline(line, column, max_length)
             return True
 
-        return self.integer(line, column, max_length, value)
+        return self._integer_task(line, column, max_length, value)
 
     def _text(self, init, params): # pylint: disable-msg=unused-argument
         """
@@ -820,7 +967,7 @@ class UI:
                 location += len(option)+1
             return True
 
-        return self.select(line, column, options, value)
+        return self._select_task(line, column, options, value)
 
     # Form item type constants
     HEAD = _head
@@ -949,6 +1096,13 @@ class UI:
                 4 selected         Currently selected string
             ===== ================ ==========================
 
+        """
+        return self._run(self._form_task(items, line))
+
+    def _form_task(self, items, line=7):
+        """
+        form generator, yields the ms to wait for a button press
+        and is sent the button that was read.
         """
         self.fill(self.background)
 
@@ -964,7 +1118,7 @@ class UI:
 
         while btn != -button.CENTER:
             field = items[fields[current]][self.FLD]
-            btn, value = field(False, items[fields[current]][1:])
+            btn, value = yield from field(False, items[fields[current]][1:])
             items[fields[current]][self.VAL] = value
             if btn in (button.CENTER, -button.RIGHT):
                 current += 1
@@ -974,4 +1128,5 @@ class UI:
                 current -= 1
                 current %= field_count
 
-        return self.select(line, 0, (" Accept ", " Cancel "), 0)[1] == 0
+        result = yield from self._select_task(line, 0, (" Accept ", " Cancel "), 0)
+        return result[1] == 0
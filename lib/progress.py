@@ -0,0 +1,229 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module progress
+
+    Show plot progress on the OLED display while the TurtlePlotBot draws.
+
+    Example::
+
+        uio = oledui.UI()
+        bot = TurtlePlotBot()
+        view = progress.Progress(uio, bot, "Writing")
+        view.estimate(lambda turtle: turtle.write("Hello!"))
+        view.start()
+        try:
+            bot.write("Hello!")
+            view.finish()
+        except Cancelled:
+            view.cancel()
+
+"""
+
+# pylint: disable-msg=import-error, no-member
+import time
+import stepkernel
+from turtleplotbot import TurtlePlotBot, DRAW
+
+# pylint: disable-msg=invalid-name
+const = lambda x: x
+
+_REFRESH_MS = const(1000)   # minimum ms between display updates
+
+
+# pylint: disable-msg=too-many-ancestors
+class Estimate(TurtlePlotBot):
+    """
+    TurtlePlotBot without hardware that counts the steps and pen moves a
+    job would take instead of moving.
+
+    Args:
+        bot (optional TurtlePlotBot): bot whose timing settings to use,
+            defaults to the TurtlePlotBot defaults
+    """
+    def __init__(self, bot=None):
+        self.move_us = 0
+        self.pen_moves = 0
+        super().__init__()
+        self.gc_control = False
+        if bot is not None:
+            self._step_delay = bot._step_delay
+            self._pen_delay = bot._pen_delay
+            self._feeds = [list(feed) for feed in bot._feeds]
+
+    def _hardware(self, scl, sda):
+        """
+        No hardware, moves are only counted
+        """
+        self.mcp23008 = None
+
+    def _movesteppers(self, left, right, feed=DRAW):
+        """
+        Count the steps and time for a move
+        """
+        move = self._plan(left, right, feed)
+        self.move_us += stepkernel.duration_us(move)
+        self._segment_done(move)
+
+    def _pen(self, down):
+        """
+        Count a pen move
+        """
+        self.pen_moves += 1
+
+    def time_ms(self):
+        """
+        Return the estimated time for the counted steps and pen moves
+
+        Returns:
+            int: estimated time in ms
+        """
+        return self.move_us // 1000 + self.pen_moves * self._pen_delay
+
+
+class Progress():
+    """
+    Progress view showing percent complete, elapsed time, estimated time
+    remaining and distance drawn. The view is updated by the bot between
+    moves, no more often than every `refresh_ms` ms, and only lines that
+    changed are redrawn and sent to the display.
+
+    Args:
+        uio (oledui.UI): UI to draw on
+        bot (TurtlePlotBot): bot to show progress for
+        title (optional str): title to show, defaults to "Plotting"
+        refresh_ms (optional int): minimum ms between updates, defaults to 1000ms
+    """
+    def __init__(self, uio, bot, title="Plotting", refresh_ms=_REFRESH_MS):
+        self.uio = uio
+        self.bot = bot
+        self.title = title
+        self.refresh_ms = refresh_ms
+        self.total_steps = 0
+        self.total_ms = 0
+        self._start_ms = 0
+        self._last_ms = 0
+        self._start_steps = 0
+        self._start_drawn = 0.0
+        self._lines = [None, None, None, None]
+
+    def estimate(self, job, *args):
+        """
+        Set the job size by running job on an `Estimate` of the bot
+
+        Args:
+            job (callable): function called with a turtle and args that makes
+                the same moves as the job that will be plotted.
+        """
+        turtle = Estimate(self.bot)
+        job(turtle, *args)
+        self.total_steps = turtle.steps_taken
+        self.total_ms = turtle.time_ms()
+
+    def start(self):
+        """
+        Show the view and start updating it as the bot moves
+        """
+        self._start_ms = self._last_ms = time.ticks_ms()
+        self._start_steps = self.bot.steps_taken
+        self._start_drawn = self.bot.distance_drawn
+        self._lines = [None, None, None, None]
+        self.uio.cls(self.title, 0, True)
+        self.bot.progress = self
+        self._draw()
+
+    def finish(self):
+        """
+        Show the final totals and stop updating the view
+        """
+        self.bot.progress = None
+        self._draw(True)
+
+    def cancel(self):
+        """
+        Show the totals so far marked as cancelled and stop updating the view
+        """
+        self.bot.progress = None
+        self._draw(cancelled=True)
+
+    def update(self, bot):
+        """
+        Called by the bot between moves, redraws the view if `refresh_ms` ms
+        have passed since the last redraw.
+
+        Args:
+            bot (TurtlePlotBot): the bot that moved
+        """
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self._last_ms) >= self.refresh_ms:
+            self._last_ms = now
+            self._draw()
+
+    @staticmethod
+    def _clock(time_ms):
+        """
+        Return time_ms formatted as minutes and seconds
+        """
+        return "%d:%02d" % divmod(time_ms // 1000, 60)
+
+    def _line(self, index, text):
+        """
+        Center text on line index+2 if it changed since it was last drawn
+        """
+        if text != self._lines[index]:
+            self._lines[index] = text
+            self.uio.center(text, index * 2 + 2)
+
+    def _draw(self, finished=False, cancelled=False):
+        """
+        Draw the changed lines and send them to the display, showing 100%
+        if finished as the estimate may not match the steps taken exactly
+        and "Cancelled" with no ETA if cancelled.
+        """
+        elapsed = time.ticks_diff(time.ticks_ms(), self._start_ms)
+        steps = self.bot.steps_taken - self._start_steps
+
+        if finished:
+            fraction = 1.0
+            self._line(0, "100%")
+        elif self.total_steps:
+            fraction = min(steps / self.total_steps, 1.0)
+            self._line(0, "%d%%" % int(fraction * 100))
+        else:
+            fraction = 0.0
+            self._line(0, "")
+
+        if fraction:
+            remaining = int(elapsed / fraction) - elapsed
+        else:
+            remaining = self.total_ms
+
+        if cancelled:
+            self._line(0, "Cancelled")
+            self._line(2, "ETA -:--")
+        else:
+            self._line(2, "ETA " + self._clock(max(remaining, 0)))
+
+        self._line(1, "Elapsed " + self._clock(elapsed))
+        self._line(3, "Drawn %dmm" % (self.bot.distance_drawn - self._start_drawn))
+        self.uio.show()
@@ -0,0 +1,561 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module stepkernel
+
+    Stepping kernels for the TurtlePlotBot's steppers.
+
+    A kernel takes up to `count` steps of a move, writing the coil pattern
+    for both steppers to the MCP23008 on every step and waiting for the step
+    delay between steps. The move is kept in an `array('i')` created by
+    `plan` so the kernels can index it without allocating.
+
+    Three versions of the kernel are provided, all with the same arguments
+    and results:
+
+    ======= ========================================================
+    Kernel  Description
+    ======= ========================================================
+    python  bytecode, runs anywhere
+    native  the same code compiled by MicroPython's native emitter
+    viper   viper emitter version using machine word integers
+    ======= ========================================================
+
+    On CPython the decorators do nothing so every kernel runs as plain
+    Python, which keeps the module usable for testing off the robot.
+
+    `benchmark` returns the highest step rate in steps per second that each
+    kernel can sustain, with or without writing to the MCP23008::
+
+        >>> import stepkernel
+        >>> stepkernel.benchmark()
+        >>> stepkernel.benchmark(i2c=bot.mcp23008)
+
+"""
+
+# pylint: disable-msg=import-error, invalid-name, undefined-variable
+try:
+    import micropython
+except ImportError:
+    class micropython:
+        """
+        Stand in for the micropython module's code emitter decorators
+        """
+        @staticmethod
+        def native(func):
+            """Leave func as bytecode"""
+            return func
+
+        viper = native
+
+    ptr8 = ptr32 = lambda buffer: buffer
+
+from array import array
+from math import sqrt
+
+try:
+    from time import ticks_us
+except ImportError:
+    from time import perf_counter_ns
+
+    def ticks_us():
+        """
+        Return a microsecond counter that wraps like MicroPython's ticks_us
+        """
+        return (perf_counter_ns() // 1000) & 0x3fffffff
+
+const = lambda x: x
+
+REMAINING       = const(0)          # move array indexes
+STEPS           = const(1)
+LEFT            = const(2)
+RIGHT           = const(3)
+ERROR_LEFT      = const(4)
+ERROR_RIGHT     = const(5)
+PHASE_LEFT      = const(6)
+PHASE_RIGHT     = const(7)
+LAST            = const(8)
+DELAY           = const(9)          # cruise delay between steps in us
+BUDGET          = const(10)         # us a step may be late before counted
+LONGEST         = const(11)
+LATE_STEPS      = const(12)
+RAMP            = const(13)         # steps to accelerate to cruise speed
+BASE            = const(14)         # ramp step of the start speed from rest
+CURRENT         = const(15)         # current delay between steps in us/256
+STRIDE          = const(16)         # half-steps per step
+STEP_LEFT       = const(17)         # next phase change
+STEP_RIGHT      = const(18)
+CARRY_LEFT      = const(19)         # half-steps left over for the next move
+CARRY_RIGHT     = const(20)
+START           = const(21)         # delay the steppers start at in us/256
+RESTART         = const(22)         # step the speed ramp last started from
+SIZE            = const(23)
+
+HALF            = const(0)          # drive modes
+FULL            = const(1)
+WAVE            = const(2)
+
+_I2C_ADDR       = const(0x20)       # MCP23008 i2c address
+_GPIO           = const(0x09)       # MCP23008 output register
+_TICKS_MASK     = const(0x3fffffff) # ticks_us period - 1
+_TICKS_HALF     = const(0x20000000) # half the ticks_us period
+
+_STEP_MASKS     = b"\x08\x0c\x04\x06\x02\x03\x01\x09"
+
+
+def plan(left, right, delay, start=0, accel=0, mode=HALF, phases=(0, 0)):
+    """
+    Plan a move of left and right half-steps for a kernel
+
+    Args:
+        left (int): half-steps to move the left stepper, negative for reverse
+        right (int): half-steps to move the right stepper, negative for reverse
+        delay (int): us between steps at cruise speed
+        start (optional int): us between steps the steppers can start and
+            stop at without accelerating, defaults to the cruise delay
+        accel (optional int): acceleration from the start speed to the
+            cruise speed and back in steps/s/s, 0 for none
+        mode (optional int): drive mode, HALF, FULL or WAVE
+        phases (optional tuple): left and right coil phases the move starts at
+
+    Returns:
+        array: the move, see the index constants
+
+    ===== ======================================================
+    Mode  Drive
+    ===== ======================================================
+    HALF  half-steps alternating one and two coils
+    FULL  full steps with two coils on, twice the half-step speed
+    WAVE  full steps with one coil on, less torque and current
+    ===== ======================================================
+
+    A FULL or WAVE move makes one half-step first if the starting phase has
+    the wrong number of coils on. Half-steps that do not make a whole step
+    are left in the CARRY fields for the caller to add to its next move so
+    the position stays exact in half-steps.
+
+    The stepper with the most steps to take is stepped on every tick, the
+    other is spread evenly over the move using Bresenham's algorithm so both
+    finish together. The step delay follows a trapezoidal speed profile
+    worked out a step at a time with David Austin's approximation. The
+    caller sets the coil phases and late step budget before running a kernel.
+    """
+    move = array("i", bytes(SIZE * 4))
+    stride = 1 if mode == HALF else 2
+    move[STRIDE] = stride
+    for motor, half_steps in enumerate((left, right)):
+        # the phase counts down when a stepper moves forward
+        direction = -1 if half_steps > 0 else 1
+        align = int(stride == 2 and half_steps != 0 and (phases[motor] & 1) != (mode == FULL))
+        rest = abs(half_steps) - align
+        move[LEFT + motor] = -direction * (align + rest // stride)
+        move[STEP_LEFT + motor] = direction * (1 if align else stride)
+        move[CARRY_LEFT + motor] = -direction * (rest % stride)
+
+    left = move[LEFT]
+    right = move[RIGHT]
+    steps = max(abs(left), abs(right))
+    move[REMAINING] = move[STEPS] = steps
+    move[ERROR_LEFT] = move[ERROR_RIGHT] = steps // 2
+    move[DELAY] = delay
+    move[CURRENT] = delay << 8
+    if accel and start > delay:
+        # steps from rest to the start and cruise speeds, v*v / 2a
+        base = max(1, int(5e11 / start / start / accel))
+        move[RAMP] = int(5e11 / delay / delay / accel) - base
+        move[BASE] = base
+        move[CURRENT] = start << 8
+
+    move[START] = move[CURRENT]
+    move[LAST] = ticks_us()
+    return move
+
+
+def resume(move):
+    """
+    Restart a move that was stopped part way from rest, the steppers start
+    again at the start speed and accelerate back to the cruise speed over
+    the remaining steps. The time stopped is not counted as a step gap.
+
+    Args:
+        move (array): move returned by `plan`
+    """
+    move[CURRENT] = move[START]
+    move[RESTART] = move[STEPS] - move[REMAINING]
+    move[LAST] = ticks_us()
+
+
+def duration_us(move):
+    """
+    Return the approximate time in us a move planned by `plan` will take
+    """
+    steps = move[STEPS]
+    ramp = min(move[RAMP], steps // 2)
+    if not ramp:
+        return steps * move[DELAY]
+
+    # time from rest to ramp step n is 2 * start * sqrt(n * base)
+    base = move[BASE]
+    start = move[START] >> 8
+    reached = sqrt((base + ramp) * base)
+    cruise = max(move[DELAY], start * base / reached)
+    return int(4 * start * (reached - base) + (steps - 2 * ramp) * cruise)
+
+
+def python_kernel(move, count, i2c, out, ticks):
+    """
+    Take up to count steps of move
+
+    Args:
+        move (array): move returned by `plan`
+        count (int): maximum number of steps to take
+        i2c (machine.I2C): bus the MCP23008 is on
+        out (bytearray): one byte output buffer
+        ticks (function): ticks_us function
+
+    Returns:
+        int: number of steps remaining in the move
+    """
+    remaining = move[REMAINING]
+    if count > remaining:
+        count = remaining
+    move[REMAINING] = remaining - count
+
+    steps = move[STEPS]
+    index = steps - remaining
+    ramp = move[RAMP]
+    base = move[BASE]
+    restart = move[RESTART]
+    current = move[CURRENT]
+    left = move[LEFT]
+    right = move[RIGHT]
+    left_abs = abs(left)
+    right_abs = abs(right)
+    left_error = move[ERROR_LEFT]
+    right_error = move[ERROR_RIGHT]
+    left_phase = move[PHASE_LEFT]
+    right_phase = move[PHASE_RIGHT]
+    left_step = move[STEP_LEFT]
+    right_step = move[STEP_RIGHT]
+    stride = move[STRIDE]
+    left_stride = -stride if left > 0 else stride
+    right_stride = -stride if right > 0 else stride
+    last = move[LAST]
+    delay = move[DELAY] << 8
+    budget = move[BUDGET]
+    longest = move[LONGEST]
+    late_steps = move[LATE_STEPS]
+    masks = _STEP_MASKS
+
+    for _ in range(count):
+        now = ticks()
+        gap = ((now - last + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF
+        last = now
+        if gap > longest:
+            longest = gap
+        if gap > (current >> 8) + budget:
+            late_steps += 1
+
+        pattern = 0
+        if left:
+            left_phase &= 0x07
+            pattern = masks[left_phase]
+            left_error -= left_abs
+            if left_error < 0:
+                left_error += steps
+                left_phase += left_step
+                left_step = left_stride
+
+        if right:
+            right_phase &= 0x07
+            pattern |= masks[right_phase] << 4
+            right_error -= right_abs
+            if right_error < 0:
+                right_error += steps
+                right_phase += right_step
+                right_step = right_stride
+
+        out[0] = pattern
+        i2c.writeto_mem(_I2C_ADDR, _GPIO, out)
+
+        after = steps - index - 1
+        run = index - restart
+        if run < ramp and run <= after:
+            if run:
+                current -= 2 * current // (4 * (base + run) + 1)
+                if current < delay:
+                    current = delay
+        elif after < ramp:
+            current += 2 * current // (4 * (base + after) + 3)
+        index += 1
+
+        while ((ticks() - last + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF < current >> 8:
+            pass
+
+    move[ERROR_LEFT] = left_error
+    move[ERROR_RIGHT] = right_error
+    move[PHASE_LEFT] = left_phase
+    move[PHASE_RIGHT] = right_phase
+    move[STEP_LEFT] = left_step
+    move[STEP_RIGHT] = right_step
+    move[LAST] = last
+    move[LONGEST] = longest
+    move[LATE_STEPS] = late_steps
+    move[CURRENT] = current
+    return move[REMAINING]
+
+
+@micropython.native
+def native_kernel(move, count, i2c, out, ticks):
+    """
+    `python_kernel` compiled by the native code emitter
+    """
+    remaining = move[REMAINING]
+    if count > remaining:
+        count = remaining
+    move[REMAINING] = remaining - count
+
+    steps = move[STEPS]
+    index = steps - remaining
+    ramp = move[RAMP]
+    base = move[BASE]
+    restart = move[RESTART]
+    current = move[CURRENT]
+    left = move[LEFT]
+    right = move[RIGHT]
+    left_abs = abs(left)
+    right_abs = abs(right)
+    left_error = move[ERROR_LEFT]
+    right_error = move[ERROR_RIGHT]
+    left_phase = move[PHASE_LEFT]
+    right_phase = move[PHASE_RIGHT]
+    left_step = move[STEP_LEFT]
+    right_step = move[STEP_RIGHT]
+    stride = move[STRIDE]
+    left_stride = -stride if left > 0 else stride
+    right_stride = -stride if right > 0 else stride
+    last = move[LAST]
+    delay = move[DELAY] << 8
+    budget = move[BUDGET]
+    longest = move[LONGEST]
+    late_steps = move[LATE_STEPS]
+    masks = _STEP_MASKS
+
+    for _ in range(count):
+        now = ticks()
+        gap = ((now - last + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF
+        last = now
+        if gap > longest:
+            longest = gap
+        if gap > (current >> 8) + budget:
+            late_steps += 1
+
+        pattern = 0
+        if left:
+            left_phase &= 0x07
+            pattern = masks[left_phase]
+            left_error -= left_abs
+            if left_error < 0:
+                left_error += steps
+                left_phase += left_step
+                left_step = left_stride
+
+        if right:
+            right_phase &= 0x07
+            pattern |= masks[right_phase] << 4
+            right_error -= right_abs
+            if right_error < 0:
+                right_error += steps
+                right_phase += right_step
+                right_step = right_stride
+
+        out[0] = pattern
+        i2c.writeto_mem(_I2C_ADDR, _GPIO, out)
+
+        after = steps - index - 1
+        run = index - restart
+        if run < ramp and run <= after:
+            if run:
+                current -= 2 * current // (4 * (base + run) + 1)
+                if current < delay:
+                    current = delay
+        elif after < ramp:
+            current += 2 * current // (4 * (base + after) + 3)
+        index += 1
+
+        while ((ticks() - last + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF < current >> 8:
+            pass
+
+    move[ERROR_LEFT] = left_error
+    move[ERROR_RIGHT] = right_error
+    move[PHASE_LEFT] = left_phase
+    move[PHASE_RIGHT] = right_phase
+    move[STEP_LEFT] = left_step
+    move[STEP_RIGHT] = right_step
+    move[LAST] = last
+    move[LONGEST] = longest
+    move[LATE_STEPS] = late_steps
+    move[CURRENT] = current
+    return move[REMAINING]
+
+
+@micropython.viper
+def viper_kernel(move, count: int, i2c, out, ticks) -> int:
+    """
+    `python_kernel` for the viper code emitter, the move is accessed through
+    a pointer and all arithmetic is done on machine words.
+    """
+    state = ptr32(move)
+    masks = ptr8(_STEP_MASKS)
+    buffer = ptr8(out)
+    write = i2c.writeto_mem
+
+    remaining = int(state[REMAINING])
+    if count > remaining:
+        count = remaining
+    state[REMAINING] = remaining - count
+
+    steps = int(state[STEPS])
+    index = steps - remaining
+    ramp = int(state[RAMP])
+    base = int(state[BASE])
+    restart = int(state[RESTART])
+    current = int(state[CURRENT])
+    left = int(state[LEFT])
+    right = int(state[RIGHT])
+    left_abs = left if left >= 0 else 0 - left
+    right_abs = right if right >= 0 else 0 - right
+    left_error = int(state[ERROR_LEFT])
+    right_error = int(state[ERROR_RIGHT])
+    left_phase = int(state[PHASE_LEFT])
+    right_phase = int(state[PHASE_RIGHT])
+    left_step = int(state[STEP_LEFT])
+    right_step = int(state[STEP_RIGHT])
+    stride = int(state[STRIDE])
+    left_stride = 0 - stride if left > 0 else stride
+    right_stride = 0 - stride if right > 0 else stride
+    last = int(state[LAST])
+    delay = int(state[DELAY]) << 8
+    budget = int(state[BUDGET])
+    longest = int(state[LONGEST])
+    late_steps = int(state[LATE_STEPS])
+
+    for _ in range(count):
+        now = int(ticks())
+        gap = ((now - last + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF
+        last = now
+        if gap > longest:
+            longest = gap
+        if gap > (current >> 8) + budget:
+            late_steps += 1
+
+        pattern = 0
+        if left:
+            left_phase &= 0x07
+            pattern = int(masks[left_phase])
+            left_error -= left_abs
+            if left_error < 0:
+                left_error += steps
+                left_phase += left_step
+                left_step = left_stride
+
+        if right:
+            right_phase &= 0x07
+            pattern |= int(masks[right_phase]) << 4
+            right_error -= right_abs
+            if right_error < 0:
+                right_error += steps
+                right_phase += right_step
+                right_step = right_stride
+
+        buffer[0] = pattern
+        write(_I2C_ADDR, _GPIO, out)
+
+        after = steps - index - 1
+        run = index - restart
+        if run < ramp and run <= after:
+            if run:
+                current -= 2 * current // (4 * (base + run) + 1)
+                if current < delay:
+                    current = delay
+        elif after < ramp:
+            current += 2 * current // (4 * (base + after) + 3)
+        index += 1
+
+        while ((int(ticks()) - last + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF < current >> 8:
+            pass
+
+    state[ERROR_LEFT] = left_error
+    state[ERROR_RIGHT] = right_error
+    state[PHASE_LEFT] = left_phase
+    state[PHASE_RIGHT] = right_phase
+    state[STEP_LEFT] = left_step
+    state[STEP_RIGHT] = right_step
+    state[LAST] = last
+    state[LONGEST] = longest
+    state[LATE_STEPS] = late_steps
+    state[CURRENT] = current
+    return int(state[REMAINING])
+
+
+KERNELS = {
+    "python": python_kernel,
+    "native": native_kernel,
+    "viper": viper_kernel}
+
+
+class _NoI2C():
+    """
+    I2C bus stand in that discards writes, used by `benchmark`
+    """
+    def writeto_mem(self, addr, memaddr, buf):
+        """Discard a write"""
+
+
+def benchmark(steps=2000, i2c=None):
+    """
+    Measure the highest step rate each kernel can sustain by running a move
+    with no delay between steps.
+
+    Args:
+        steps (optional int): steps to time each kernel for, defaults to 2000
+        i2c (optional machine.I2C): bus the MCP23008 is on, defaults to timing
+            the kernels without writing to the steppers.
+
+    Returns:
+        dict: steps per second for each kernel name
+    """
+    if i2c is None:
+        i2c = _NoI2C()
+
+    out = bytearray(1)
+    results = {}
+    for name, kernel in KERNELS.items():
+        move = plan(steps, steps // 3, 0)
+        start = ticks_us()
+        kernel(move, steps, i2c, out, ticks_us)
+        elapsed = ((ticks_us() - start + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF
+        results[name] = steps * 1000000 // max(elapsed, 1)
+
+    i2c.writeto_mem(_I2C_ADDR, _GPIO, bytes(1))
+    return results
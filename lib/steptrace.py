@@ -0,0 +1,252 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module steptrace
+
+    Record the time between the steps the TurtlePlotBot sends to its
+    steppers to find uneven step timing.
+
+    Example::
+
+        import steptrace
+
+        trace = steptrace.StepTrace()
+        trace.attach(bot)
+        bot.write("Hello!")
+        trace.detach(bot)
+        print(trace.moves())
+        trace.export("/trace.csv")
+
+    The trace stands in for the MCP23008's I2C bus while it is attached, so
+    every coil pattern a stepping kernel writes is timed when it is sent.
+    The intervals of the last `size` steps are kept in a preallocated
+    `array('H')` ring, longer intervals are stored as 65535. When a move
+    finishes its minimum, maximum and 99th percentile intervals and its
+    late steps, the kernel's count of steps more than `gap_budget_us` late,
+    are added to a ring of the last `moves_size` moves. The minimum and
+    maximum cover every step of the move. The 99th percentile is taken from
+    the ring, so for moves longer than `size` steps it only covers the
+    move's last `size` steps.
+
+"""
+
+# pylint: disable-msg=import-error, no-member
+import time
+from array import array
+
+# pylint: disable-msg=invalid-name
+const = lambda x: x
+
+_SIZE = const(1024)         # default number of step intervals kept
+_MOVES_SIZE = const(64)     # default number of move summaries kept
+_LONGEST = const(65535)     # largest interval that can be stored
+_MOVE_START = const(0)      # interval stored before the first step of a move
+
+_FIELDS = const(5)          # move summary fields
+_STEPS = const(0)
+_MINIMUM = const(1)
+_MAXIMUM = const(2)
+_P99 = const(3)
+_OVERRUNS = const(4)
+
+
+class StepTrace():
+    """
+    Step interval recorder for a TurtlePlotBot
+
+    Args:
+        size (optional int): step intervals to keep, defaults to 1024
+        moves_size (optional int): move summaries to keep, defaults to 64
+    """
+    def __init__(self, size=_SIZE, moves_size=_MOVES_SIZE):
+        self.intervals = array("H", [0] * size)
+        self.summaries = array("H", [0] * (moves_size * _FIELDS))
+        self.i2c = None
+        self._ticks_us = time.ticks_us
+        self._ticks_diff = time.ticks_diff
+        self.reset()
+
+    def reset(self):
+        """
+        Discard the recorded intervals and move summaries
+        """
+        self._next = 0              # next interval slot
+        self._count = 0             # intervals recorded
+        self._move_start = 0        # count at the start of the current move
+        self._last = None           # ticks_us of the last step in this move
+        self._minimum = _LONGEST    # shortest interval of the current move
+        self._maximum = 0           # longest interval of the current move
+        self._move = 0              # next move summary slot
+        self._moves = 0             # move summaries recorded
+        self._late_steps = 0        # bot late steps at the end of the last move
+
+    def attach(self, bot):
+        """
+        Start recording the steps of bot
+
+        Args:
+            bot (TurtlePlotBot): bot to record
+        """
+        self.i2c = bot.mcp23008
+        self._late_steps = bot.diagnostics()["late_steps"]
+        self._last = None
+        self._minimum = _LONGEST
+        self._maximum = 0
+        self._move_start = self._count
+        bot.trace = self
+
+    def detach(self, bot):
+        """
+        Stop recording the steps of bot, the recorded intervals are kept
+
+        Args:
+            bot (TurtlePlotBot): bot to stop recording
+        """
+        bot.trace = None
+
+    def _add(self, interval):
+        """
+        Add interval to the ring
+        """
+        index = self._next
+        self.intervals[index] = interval
+        index += 1
+        self._next = 0 if index == len(self.intervals) else index
+        self._count += 1
+
+    def writeto_mem(self, addr, memaddr, buf):
+        """
+        Time a step and write its coil pattern to the MCP23008, called by the
+        stepping kernels in place of `machine.I2C.writeto_mem`.
+        """
+        now = self._ticks_us()
+        last = self._last
+        self._last = now
+        if last is None:
+            self._add(_MOVE_START)
+        else:
+            interval = self._ticks_diff(now, last)
+            if interval > _LONGEST:
+                interval = _LONGEST
+            if interval < self._minimum:
+                self._minimum = interval
+            if interval > self._maximum:
+                self._maximum = interval
+            self._add(interval)
+
+        self.i2c.writeto_mem(addr, memaddr, buf)
+
+    def _recent(self, count):
+        """
+        Return the last count intervals still in the ring, oldest first
+        """
+        count = min(count, self._count, len(self.intervals))
+        size = len(self.intervals)
+        start = (self._next - count) % size
+        return [self.intervals[(start + i) % size] for i in range(count)]
+
+    def move_done(self, bot):
+        """
+        Summarize the intervals of the move that just finished, called by the
+        bot between moves.
+
+        Args:
+            bot (TurtlePlotBot): the bot that moved
+        """
+        steps = self._count - self._move_start
+        self._move_start = self._count
+        self._last = None
+        minimum, maximum = self._minimum, self._maximum
+        self._minimum, self._maximum = _LONGEST, 0
+        if not steps:
+            return
+        if steps == 1:
+            minimum = 0
+
+        # the first entry of a move marks its start and is not an interval
+        intervals = self._recent(steps - 1) if steps > 1 else [0]
+        intervals.sort()
+
+        late_steps = bot.diagnostics()["late_steps"]
+        overruns = max(late_steps - self._late_steps, 0)
+        self._late_steps = late_steps
+
+        base = self._move * _FIELDS
+        summaries = self.summaries
+        summaries[base + _STEPS] = min(steps, _LONGEST)
+        summaries[base + _MINIMUM] = minimum
+        summaries[base + _MAXIMUM] = maximum
+        summaries[base + _P99] = intervals[(len(intervals) * 99) // 100]
+        summaries[base + _OVERRUNS] = min(overruns, _LONGEST)
+
+        self._move += 1
+        if self._move * _FIELDS == len(summaries):
+            self._move = 0
+        self._moves += 1
+
+    def moves(self):
+        """
+        Return the summaries of the recorded moves still in the ring
+
+        Returns:
+            list: (steps, min_us, max_us, p99_us, overruns) tuple for each
+                move, oldest first
+        """
+        size = len(self.summaries) // _FIELDS
+        count = min(self._moves, size)
+        start = (self._move - count) % size
+        result = []
+        for i in range(count):
+            base = ((start + i) % size) * _FIELDS
+            result.append(tuple(self.summaries[base:base + _FIELDS]))
+
+        return result
+
+    def export(self, filename):
+        """
+        Write the recorded step intervals to filename as CSV for graphing,
+        moves are numbered from the oldest move with steps still in the ring.
+
+        Args:
+            filename (str): file to write
+        """
+        move = 0
+        with open(filename, "w") as file:
+            file.write("move,step,interval_us\n")
+            for step, interval in enumerate(self._recent(self._count)):
+                if interval == _MOVE_START and step:
+                    move += 1
+                elif interval != _MOVE_START:
+                    file.write("%d,%d,%d\n" % (move, step, interval))
+
+    def export_moves(self, filename):
+        """
+        Write the move summaries to filename as CSV
+
+        Args:
+            filename (str): file to write
+        """
+        with open(filename, "w") as file:
+            file.write("steps,min_us,max_us,p99_us,overruns\n")
+            for summary in self.moves():
+                file.write("%d,%d,%d,%d,%d\n" % summary)
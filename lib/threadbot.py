@@ -0,0 +1,279 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+module threadbot
+
+    TurtlePlotBot that steps the motors on a `_thread` worker while the main
+    thread works out the moves that follow.
+
+    Example::
+
+        import threadbot
+
+        bot = threadbot.ThreadedTurtlePlotBot()
+        bot.pendown()
+        bot.write("Hello!")     # returns once the last move is queued
+        bot.wait()              # wait for the moves to finish
+        bot.done()
+
+    Moves and pen changes are passed to the worker through a `Ring`,
+    a single producer, single consumer ring buffer that needs no locks. If
+    `_thread` is not available the bot runs each move as it is made, the
+    same as `turtleplotbot.TurtlePlotBot`.
+
+    MicroPython on the ESP32 has a global interpreter lock, the threads take
+    turns rather than running at the same time. The main thread runs while
+    the worker waits between steps, so the worker uses the bytecode stepping
+    kernel where the interpreter can switch threads during the wait.
+
+"""
+
+# pylint: disable-msg=import-error, no-member
+import time
+import stepkernel
+from turtleplotbot import TurtlePlotBot, DRAW
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+# pylint: disable-msg=invalid-name
+const = lambda x: x
+
+_QUEUE_SIZE = const(16)     # default number of queued moves and pen changes
+_WAIT_MS = const(1)         # ms to sleep while waiting on the other thread
+_CHECK_STEPS = const(200)   # steps between joystick checks
+
+
+class Ring():
+    """
+    Fixed size single producer, single consumer ring buffer. Only the
+    producer changes the head and only the consumer changes the tail so
+    neither needs a lock.
+
+    Args:
+        size (optional int): number of slots, holds at most size - 1 items
+    """
+    def __init__(self, size=_QUEUE_SIZE):
+        self._slots = [None] * size
+        self._head = 0          # next slot to fill, changed by the producer
+        self._tail = 0          # next slot to empty, changed by the consumer
+
+    def __len__(self):
+        return (self._head - self._tail) % len(self._slots)
+
+    def put(self, item):
+        """
+        Add item to the ring, only call from the producer
+
+        Returns:
+            bool: False if the ring was full
+        """
+        head = self._head
+        after = (head + 1) % len(self._slots)
+        if after == self._tail:
+            return False
+
+        self._slots[head] = item
+        self._head = after
+        return True
+
+    def get(self):
+        """
+        Remove and return the oldest item, only call from the consumer
+
+        Returns:
+            the item or None if the ring was empty
+        """
+        tail = self._tail
+        if tail == self._head:
+            return None
+
+        item = self._slots[tail]
+        self._slots[tail] = None
+        self._tail = (tail + 1) % len(self._slots)
+        return item
+
+    def discard(self):
+        """
+        Remove every item, only call from the consumer
+        """
+        while self.get() is not None:
+            pass
+
+
+class ThreadedTurtlePlotBot(TurtlePlotBot):
+    """
+    TurtlePlotBot that queues its moves for a worker thread
+
+    Args:
+        size (optional int): ring buffer size, defaults to 16
+
+    Other arguments are passed to `TurtlePlotBot`
+
+    Motion methods return as soon as their moves are queued and only block
+    when the ring is full. Call `wait` before reading the joystick or
+    anything else that needs the robot to have stopped. An exception raised
+    by the worker, such as `turtleplotbot.Cancelled`, discards the queued
+    moves and is raised again by the next motion method or `wait`.
+    """
+    def __init__(self, size=_QUEUE_SIZE, **kwargs):
+        self.queue = Ring(size)
+        self.threaded = False
+        self._running = False
+        self._busy = False
+        self._error = None
+        self._held_at = 0
+        super().__init__(**kwargs)
+
+        if _thread is not None:
+            self.kernel = stepkernel.python_kernel
+            self._running = True
+            self.threaded = True
+            _thread.start_new_thread(self._worker, ())
+
+    def _raise(self):
+        """
+        Raise the last exception from the worker thread if there was one
+        """
+        error = self._error
+        if error is not None:
+            self._error = None
+            raise error
+
+    def _put(self, item):
+        """
+        Queue item for the worker thread, waiting while the ring is full
+        """
+        self._raise()
+        while not self.queue.put(item):
+            time.sleep_ms(_WAIT_MS)
+            self._raise()
+
+    def _movesteppers(self, left, right, feed=DRAW):
+        """
+        Queue a stepper move, or make it now if there is no worker
+
+        Args:
+            left (float or integer): millimeters to move left stepper
+            right (float or integer): millimeters to move right stepper
+            feed (optional int): speed to move at, TRAVEL, DRAW or TURN
+        """
+        if self._running:
+            self._put((left, right, feed))
+        else:
+            super()._movesteppers(left, right, feed)
+
+    def _pen(self, down):
+        """
+        Queue a pen move, or make it now if there is no worker
+
+        Args:
+                down (boolean):
+        """
+        if self._running:
+            self._put(down)
+        else:
+            super()._pen(down)
+
+    def _worker(self):
+        """
+        Worker thread, runs queued moves until `done` stops it
+        """
+        while self._running:
+            self._busy = True
+            item = self.queue.get()
+            if item is None:
+                if self._held and time.ticks_diff(
+                        time.ticks_ms(), self._held_at) >= self.hold_ms:
+                    self._release()
+                self._busy = False
+                time.sleep_ms(_WAIT_MS)
+                continue
+
+            try:
+                self._execute(item)
+            except Exception as error: # pylint: disable=broad-except
+                self._error = error
+                self.queue.discard()
+
+            self._busy = False
+
+        self._busy = False
+
+    def _execute(self, item):
+        """
+        Run a queued pen change or stepper move on the worker thread
+        """
+        if isinstance(item, bool):
+            super()._pen(item)
+            return
+
+        self._check()
+        move = self._plan(*item)
+        self._engage()
+        while self._step(move, _CHECK_STEPS):
+            self._check(move)
+
+        self._idle()
+        self._segment_done(move)
+
+    def _idle(self):
+        """
+        Hold the coils after a move, the worker releases them once it has
+        been idle for `hold_ms` ms rather than using a timer so only the
+        worker writes to the I2C bus.
+        """
+        if not self._running:
+            super()._idle()
+            return
+
+        self._moving = False
+        if self.hold_ms:
+            self._held = True
+            self._held_at = time.ticks_ms()
+        else:
+            self._release()
+
+    def wait(self):
+        """
+        Wait until every queued move has been made
+        """
+        while self.queue or self._busy:
+            time.sleep_ms(_WAIT_MS)
+
+        self._raise()
+
+    def done(self):
+        """
+        Wait for the queued moves, stop the worker thread, raise pen and turn
+        off the stepper motors.
+        """
+        self.penup()
+        self.wait()
+        self._running = False
+        while self._busy:
+            time.sleep_ms(_WAIT_MS)
+
+        super().done()
@@ -0,0 +1,87 @@
+# MIT License
+#
+# Copyright (c) 2020 Russ Hughes
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+module timers
+
+    The machine.Timers used by the TurtlePlotBot modules.
+
+    Modules ask `timer` for their timer using an id from this module so no
+    two of them share a hardware timer. Ports with virtual timers get a
+    virtual timer instead, leaving the hardware timers free. The ESP32 has
+    four hardware timers, 0 to 3, `USER` is not used by the library and is
+    left for programs.
+
+    ======== ===================================================
+    Id       Used by
+    ======== ===================================================
+    JOYSTICK `button.JoyStick` debounce and long presses
+    HOLD     `turtleplotbot.TurtlePlotBot` releasing the coils
+    CONFIG   `config.Config` delayed writes
+    USER     free for programs
+    ======== ===================================================
+
+"""
+
+# pylint: disable-msg=import-error
+try:
+    import machine
+except ImportError:
+    machine = None
+
+# pylint: disable-msg=invalid-name
+const = lambda x: x
+
+JOYSTICK = const(0)
+HOLD = const(1)
+CONFIG = const(2)
+USER = const(3)
+
+_virtual = None             # True if the port has virtual timers
+
+
+def timer(timer_id):
+    """
+    Return a machine.Timer for one of the ids in this module
+
+    Args:
+        timer_id (int): JOYSTICK, HOLD, CONFIG or USER
+
+    Returns:
+        machine.Timer: a virtual timer if the port has them otherwise the
+            hardware timer timer_id, None if there is no machine module
+    """
+    global _virtual         # pylint: disable-msg=global-statement
+
+    if machine is None:
+        return None
+
+    if _virtual is not False:
+        try:
+            result = machine.Timer(-1)
+            _virtual = True
+            return result
+        except (ValueError, OSError):
+            _virtual = False
+
+    return machine.Timer(timer_id)
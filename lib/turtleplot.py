@@ -66,6 +66,19 @@
 
 import math
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _flatten(points):
+    """Return points as a flat sequence of x, y values"""
+    if numpy is not None:
+        return numpy.asarray(points, dtype=float).reshape(-1).tolist()
+    return points
+
+
 class Vec2D:
     """A 2 dimensional vector class, used as a helper class for implementing
     turtle graphics. May be useful for turtle graphics programs also.
@@ -129,9 +142,9 @@ class Vec2D:
 class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-many-locals,too-many-public-methods
     """TurtlePlot Class
     """
-    START_ORIENTATION = {
-        "standard": Vec2D(1.0, 0.0),
-        "logo"    : Vec2D(0.0, 1.0)}
+    START_HEADING = {
+        "standard": 0.0,
+        "logo"    : 90.0}
     DEFAULT_MODE = "standard"
     DEFAULT_ANGLEOFFSET = 0
     DEFAULT_ANGLEORIENT = 1
@@ -141,11 +154,14 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
         self.degrees()
         self._scale = 1.0
         self._position = Vec2D(0.0, 0.0)
-        self._orient = self.START_ORIENTATION[self._mode]
+        self._set_heading(self.START_HEADING[self._mode])
         self._angle_offset = self.DEFAULT_ANGLEOFFSET
         self._fullcircle = 360
         self._degrees_per_au = 1
         self._drawing = False
+        self._reverse_travel = False
+        self._reverse_draw = False
+        self._corridor = 0
 
 
     def mode(self, mode=None):
@@ -189,7 +205,8 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
         """
         self._scale = 1.0
         self._position = Vec2D(0.0, 0.0)
-        self._orient = self.START_ORIENTATION[self._mode]
+        self._set_heading(self.START_HEADING[self._mode])
+        self._rotation_saved = 0.0
 
 
     def _setmode(self, mode=None):
@@ -282,6 +299,94 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
         return self._scale
 
 
+    def setreverse(self, travel=None, draw=None):
+        """Allow goto moves to drive backwards when that needs less rotation.
+
+        Args:
+            travel (bool): allow reverse driving for pen up moves,
+                if None the setting is not changed
+            draw (bool): allow reverse driving for pen down moves,
+                if None the setting is not changed
+
+        Returns:
+            tuple: current (travel, draw) settings
+
+        When enabled, a move to a position behind the turtle is made by
+        turning to face away from the destination and driving backwards
+        instead of turning almost all the way around. The turtle's heading
+        after the move will be opposite the direction of travel.
+
+        Example (for a Turtle instance named turtle)::
+
+            >>> turtle.setreverse(True)
+            (True, False)
+        """
+        if travel is not None:
+            self._reverse_travel = travel
+        if draw is not None:
+            self._reverse_draw = draw
+        return (self._reverse_travel, self._reverse_draw)
+
+
+    def setcorridor(self, width=None):
+        """Set the corridor used for smooth cornering of pen up moves.
+
+        Args:
+            width (int, float): maximum distance in turtle units the turtle
+                may stray from the straight line between the start and end
+                of a pen up move, 0 turns smooth cornering off. If None the
+                setting is not changed.
+
+        Returns:
+            float: current corridor width
+
+        When smooth cornering is on, pen up moves blend the turn towards the
+        destination into the move as a single arc instead of turning in place
+        and then driving. If the arc would leave the corridor the turtle turns
+        in place just far enough for the rest of the turn to fit. The turtle's
+        heading after the move is the heading at the end of the arc.
+
+        Example (for a Turtle instance named turtle)::
+
+            >>> turtle.setcorridor(5)
+            5
+        """
+        if width is not None:
+            self._corridor = width
+        return self._corridor
+
+
+    def rotation_saved(self):
+        """Return the rotation avoided by reverse driving since the last reset.
+
+        Returns:
+            float: rotation saved in angle units
+
+        Example (for a Turtle instance named turtle)::
+
+            >>> turtle.setreverse(True)
+            >>> turtle.goto(-10, 0)
+            >>> turtle.rotation_saved()
+            180.0
+        """
+        return self._rotation_saved / self._degrees_per_au
+
+
+    def _set_heading(self, angle):
+        """set the turtle's heading to angle degrees counterclockwise from
+        east and its orientation vector to match.
+
+        The math module's sin and cos are used rather than a lookup table.
+        An interpolated float table is within 2.4e-6 of math.sin but takes
+        about five times as long per call under CPython, and on MicroPython
+        each of its float operations allocates. `fixedplot.FixedTurtlePlot`
+        has an integer sine table and CORDIC for allocation free geometry."""
+        angle %= 360.0
+        self._heading = angle
+        radians = angle * math.pi / 180.0
+        self._orient = Vec2D(math.cos(radians), math.sin(radians))
+
+
     def _go(self, distance):
         """move turtle forward by specified distance"""
         end = self._position + self._orient * distance
@@ -292,8 +397,7 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
     def _rotate(self, angle):
         """Turn turtle counterclockwise by specified angle if angle > 0."""
         angle *= self._degrees_per_au
-        neworient = self._orient.rotate(angle)
-        self._orient = neworient
+        self._set_heading(self._heading + angle)
         self._turn(angle)
 
 
@@ -314,9 +418,24 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
         self.penup()
 
         angle = self.towards(end)
-        self.setheading(angle)
         distance = self.distance(end) * self._scale
 
+        # drive backwards if that needs less rotation than driving forward
+        if distance and (self._reverse_draw if was_down else self._reverse_travel):
+            full = self._fullcircle
+            turn = (angle - self.heading())*self._angle_orient
+            turn = (turn+full/2.)%full - full/2.
+            if abs(turn) > full/4.:
+                angle = (angle + full/2.) % full
+                distance = -distance
+                self._rotation_saved += (2*abs(turn) - full/2.) * self._degrees_per_au
+
+        if distance and self._corridor and not was_down:
+            self._glide(end, angle, distance)
+            return
+
+        self.setheading(angle)
+
         # set the pen down if drawing
         if was_down:
             self.pendown()
@@ -328,6 +447,33 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
         #self.setheading(original)
 
 
+    def _glide(self, end, angle, distance):
+        """move turtle to position end along an arc starting at the current
+        heading and tangent to it, after turning in place just enough for the
+        arc to stay within the corridor."""
+        full = self._fullcircle
+        turn = (angle - self.heading())*self._angle_orient
+        turn = ((turn+full/2.)%full - full/2.) * self._degrees_per_au
+
+        # largest turn whose arc stays within the corridor, at most a half
+        # circle so the arc never overshoots the ends of the chord
+        limit = min(
+            2*math.atan(2*self._corridor*self._scale/abs(distance))*180.0/math.pi,
+            90.0)
+
+        if abs(turn) > limit:
+            pre = turn - limit if turn > 0 else turn + limit
+            self._rotate(pre / self._degrees_per_au)
+            turn -= pre
+
+        # the arc turns twice the angle between the heading and the chord
+        half = turn * math.pi / 180.0
+        length = distance * half / math.sin(half) if half else distance
+        self._set_heading(self._heading + 2*turn)
+        self._position = end
+        self._arc(length, 2*turn)
+
+
     def forward(self, distance):
         """Move the turtle forward by the specified distance.
 
@@ -528,6 +674,127 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
             self._goto(Vec2D(new_x, new_y))
 
 
+    def polyline(self, points):
+        """Move the turtle through a sequence of points.
+
+        Args:
+            points (array, list or numpy array): x, y pairs as a flat
+                sequence ``x0, y0, x1, y1, ...``, or an N x 2 numpy array
+
+        Moves the turtle to each point in turn, drawing if the pen is down,
+        the same as calling goto for each point. The turns and distances for
+        every segment are worked out before the turtle moves, with numpy on
+        CPython when it is installed, and passed straight to the robot so no
+        Vec2D is made for each point. Repeated points are skipped and the
+        pen is only raised for segments that need a turn.
+
+        Example (for a Turtle instance named turtle)::
+
+            >>> turtle.polyline(array("f", (0, 0, 40, 0, 40, 30)))
+            >>> turtle.pos()
+            (40.00,30.00)
+        """
+        self._polyline(points, False)
+
+
+    def polygon(self, points):
+        """Move the turtle through a sequence of points and back to the first.
+
+        Args:
+            points (array, list or numpy array): x, y pairs as a flat
+                sequence ``x0, y0, x1, y1, ...``, or an N x 2 numpy array
+
+        The same as `polyline` with the first point repeated at the end.
+
+        Example (for a Turtle instance named turtle)::
+
+            >>> turtle.penup()
+            >>> turtle.goto(0, 0)
+            >>> turtle.pendown()
+            >>> turtle.polygon(array("f", (0, 0, 40, 0, 20, 30)))
+        """
+        self._polyline(points, True)
+
+
+    def _polyline(self, points, close):
+        """move the turtle through points, back to the first if close"""
+        if self._reverse_travel or self._reverse_draw or self._corridor:
+            flat = _flatten(points)
+            for index in range(0, len(flat), 2):
+                self._goto(Vec2D(flat[index], flat[index + 1]))
+            if close and flat:
+                self._goto(Vec2D(flat[0], flat[1]))
+            return
+
+        moves, end, heading = self._segments(points, close)
+        if not moves:
+            return
+
+        was_down = self._drawing
+        scale = self._scale
+        for turn, distance in moves:
+            if turn:
+                if was_down:
+                    self.penup()
+                self._turn(turn)
+                if was_down:
+                    self.pendown()
+            self._move(distance * scale)
+
+        self._set_heading(heading)
+        self._position = end
+
+
+    def _segments(self, points, close):
+        """Return a list of (degrees to turn left, distance) for each segment
+        from the turtle's position through points, the end position and the
+        final heading in degrees counterclockwise from east."""
+        start_x, start_y = self._position
+        heading = self._heading
+
+        if numpy is not None:
+            coords = numpy.asarray(points, dtype=float).reshape(-1, 2)
+            if not len(coords):
+                return ([], None, heading)
+            if close:
+                coords = numpy.vstack((coords, coords[:1]))
+            delta = numpy.diff(
+                numpy.vstack(((start_x, start_y), coords)), axis=0)
+            distances = numpy.hypot(delta[:, 0], delta[:, 1])
+            keep = distances > 0
+            distances = distances[keep]
+            if not len(distances):
+                return ([], None, heading)
+            headings = numpy.degrees(numpy.arctan2(delta[keep, 1], delta[keep, 0]))
+            turns = numpy.diff(numpy.concatenate(((heading,), headings)))
+            turns = (turns + 180.0) % 360.0 - 180.0
+            end = Vec2D(float(coords[-1, 0]), float(coords[-1, 1]))
+            return (
+                list(zip(turns.tolist(), distances.tolist())),
+                end,
+                float(headings[-1]) % 360.0)
+
+        moves = []
+        last_x, last_y = start_x, start_y
+        count = len(points)
+        if not count:
+            return (moves, None, heading)
+        for index in range(0, count + 2 if close else count, 2):
+            if index == count:
+                index = 0
+            point_x, point_y = points[index], points[index + 1]
+            delta_x, delta_y = point_x - last_x, point_y - last_y
+            last_x, last_y = point_x, point_y
+            distance = math.sqrt(delta_x*delta_x + delta_y*delta_y)
+            if distance:
+                angle = math.atan2(delta_y, delta_x) * 180.0 / math.pi
+                turn = (angle - heading + 180.0) % 360.0 - 180.0
+                heading = angle % 360.0
+                moves.append((turn, distance))
+
+        return (moves, Vec2D(last_x, last_y), heading)
+
+
     def home(self):
         """Move turtle to the origin - coordinates (0,0).
 
@@ -670,9 +937,7 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
             >>> turtle.heading()
             67.0
         """
-        current_x, current_y = self._orient
-        result = round(math.atan2(current_y, current_x)*180.0/math.pi, 10) % 360.0
-        result /= self._degrees_per_au
+        result = self._heading / self._degrees_per_au
         return (self._angle_offset + self._angle_orient*result) % self._fullcircle
 
 
@@ -864,36 +1129,44 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
 
             for char in [ord(char) for char in message]:
                 if begins <= char <= ends:
-                    is_down = False
-                    (pos_x, pos_y) = self.position()
-                    file.seek((char-begins+1)*2)
-                    file.seek(int.from_bytes(file.read(2), 'little'))
-                    length = ord(file.read(1))
-                    left, right = file.read(2)
+                    self._glyph(file, char - begins)
+
+        if was_down:
+            self.pendown()
+
 
-                    left -= 0x52            # Position left side of the glyph
-                    right -= 0x52           # Position right side of the glyph
-                    width = right - left    # Calculate the character width
+    def _glyph(self, file, index):
+        """
+        Draw glyph index from the open Hershey font file starting at the
+        current location, ending at the start of the next glyph.
+        """
+        is_down = False
+        (pos_x, pos_y) = self.position()
+        file.seek((index+1)*2)
+        file.seek(int.from_bytes(file.read(2), 'little'))
+        length = ord(file.read(1))
+        left, right = file.read(2)
 
-                    for _ in range(length):
-                        vector_x, vector_y = file.read(2)
-                        vector_x -= 0x52
-                        vector_y -= 0x52
+        left -= 0x52            # Position left side of the glyph
+        right -= 0x52           # Position right side of the glyph
+        width = right - left    # Calculate the character width
 
-                        if vector_x == -50:
-                            is_down = False
-                            continue
+        for _ in range(length):
+            vector_x, vector_y = file.read(2)
+            vector_x -= 0x52
+            vector_y -= 0x52
 
-                        self._goto(
-                            Vec2D(pos_x + vector_x - left, pos_y - vector_y),
-                            is_down)
+            if vector_x == -50:
+                is_down = False
+                continue
 
-                        is_down = True
+            self._goto(
+                Vec2D(pos_x + vector_x - left, pos_y - vector_y),
+                is_down)
 
-                    self._goto(Vec2D(pos_x + width, pos_y), False)
+            is_down = True
 
-        if was_down:
-            self.pendown()
+        self._goto(Vec2D(pos_x + width, pos_y), False)
 
 
     def _turn(self, angle):
@@ -920,6 +1193,25 @@ class TurtlePlot: #pylint: disable=no-self-use,too-many-instance-attributes,too-
         print("move", distance, "is not implemented")
 
 
+    def _arc(self, distance, angle):
+        """
+        Move the turtle distance along an arc while turning left by angle
+        degrees.
+
+        Args:
+	        distance (int, float): length of the arc, negative to drive backwards
+	        angle (int, float): degrees to turn left over the length of the arc
+
+        Robots that can steer while driving should override this method, the
+        default turns in place, moves along the chord and turns again.
+        """
+        half = angle * math.pi / 360.0
+        chord = distance * math.sin(half) / half if half else distance
+        self._turn(angle/2.)
+        self._move(chord)
+        self._turn(angle/2.)
+
+
     def _pen(self, down):
         """
         Raise or Lower the turtle's pen
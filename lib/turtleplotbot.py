@@ -45,10 +45,15 @@ hardware interface needed by the `turtleplotbot` module to run a
 
 #pylint: disable-msg=import-error
 import time
+import gc
 from math import pi
 import machine
+import micropython
 from servo import Servo
 from turtleplot import TurtlePlot
+import button
+import stepkernel
+import timers
 
 #pylint: disable-msg=invalid-name
 const = lambda x: x
@@ -64,16 +69,24 @@ _PEN_DOWN_ANGLE = const(180)        # servo angle for pen down
 _STEPS_PER_REV  = const(4076)       # stepper steps per revolution
 _WHEEL_DIAMETER = 64.5    	        # in mm (increase = spiral out)
 _WHEELBASE      = 112.5             # in mm (increase = spiral in)
-_LEFT_MOTOR     = const(0)          # left motor index
-_RIGHT_MOTOR    = const(1)          # right motor index
 
 _WHEEL_BPI      = _WHEELBASE * pi
 _STEPS_PER_MM   = _STEPS_PER_REV / (_WHEEL_DIAMETER * pi)
-_MOTORS         = (_LEFT_MOTOR, _RIGHT_MOTOR)
+_CHECK_STEPS    = const(200)        # steps between joystick checks
+_SPEEDS         = (60, 50, 50)      # default travel, draw and turn mm/s
+_ACCELERATION   = const(250)        # default acceleration in mm/s/s
+_DRIVES         = (stepkernel.FULL, stepkernel.HALF, stepkernel.HALF)
+_HOLD_MS        = const(500)        # ms to hold the coils after a move
+
+TRAVEL          = const(0)          # feeds for moves with the pen up,
+DRAW            = const(1)          # moves with the pen down
+TURN            = const(2)          # and turns in place
+
+class Cancelled(Exception):
+    """
+    Raised by TurtlePlotBot moves when the plot is cancelled using the joystick
+    """
 
-_STEP_MASKS     = (
-    0b1000, 0b1100, 0b0100, 0b0110, 0b0010, 0b0011, 0b0001, 0b1001
-)
 
 class TurtlePlotBot(TurtlePlot):  # pylint: disable=too-many-instance-attributes, too-many-public-methods
     """
@@ -83,15 +96,59 @@ class TurtlePlotBot(TurtlePlot):  # pylint: disable=too-many-instance-attributes
         i2c (machine.I2C): The I2C peripheral to use.
         Defaults to creating a device using the pins
         defined in _SCL_PIN and _SDA_PIN.
+        joystick (button.JoyStick): optional joystick used to pause, resume
+        or cancel a plot.
+
+    ====== ================================================
+    Button Action while plotting
+    ====== ================================================
+    CENTER pause, raising the pen and holding the steppers
+    ====== ================================================
+
+    ====== ================================================
+    Button Action while paused
+    ====== ================================================
+    CENTER resume, lowering the pen if it was down
+    LEFT   cancel, raising `Cancelled`
+    ====== ================================================
+
+    Holding CENTER pauses then cancels. The joystick's event queue is checked
+    between moves and every 200 steps within a move.
     """
-    def __init__(self, scl=_SCL_PIN, sda=_SDA_PIN):
+    def __init__(self, scl=_SCL_PIN, sda=_SDA_PIN, joystick=None):
         """
         Initialize the turtleplotbot, optionally passing an i2c object to use.
         """
         self._current_step = [0, 0]         # current step indexes
-        self._step_delay = 1000             # us delay between steps
+        self._step_delay = 1000             # us delay steppers start at
+        self._feeds = [                     # [mm/s, mm/s/s, drive mode] by feed
+            [speed, _ACCELERATION, drive] for speed, drive in zip(_SPEEDS, _DRIVES)]
+        self._carry = [0, 0]                # half-steps not yet moved
         self._pen_delay = 250               # ms delay for pen raise or lower
+        self.steps_taken = 0                # steps taken by all moves
+        self.distance_drawn = 0.0           # mm moved with the pen down
+        self.progress = None                # optional progress.Progress view
+        self.trace = None                   # optional steptrace.StepTrace recorder
+        self.joystick = joystick            # optional pause / cancel joystick
+        self.gc_control = True              # collect before and not during moves
+        self.gap_budget_us = 500            # us a step may be late before counted
+        self.reset_diagnostics()
+        self._out = bytearray(1)            # stepper output buffer
+        self.kernel = stepkernel.viper_kernel   # stepping kernel
+        self.hold_ms = _HOLD_MS             # ms to hold coils after a move, 0 never
+        self.writes_saved = 0               # coil releases avoided by holding
+        self._held = False                  # coils energized between moves
+        self._moving = False                # steppers running
+        self._hold_timer = None
+        self._release_ref = self._scheduled_release
+        self._hardware(scl, sda)
+        super().__init__()
+
 
+    def _hardware(self, scl, sda):
+        """
+        Set up the MCP23008 stepper driver, pen servo and display power pin
+        """
         self.mcp23008 = machine.I2C(
             scl=machine.Pin(scl),
             sda=machine.Pin(sda),
@@ -115,48 +172,320 @@ class TurtlePlotBot(TurtlePlot):  # pylint: disable=too-many-instance-attributes
         self.rst = machine.Pin(16, machine.Pin.OUT)     # power pin for oled display
         self.rst.value(1)                               # power on
 
-        super().__init__()
+
+    def _setfeeds(self, index, values):
+        """
+        Set one field of the travel, draw and turn feeds
+        """
+        for feed, value in enumerate(values):
+            if value is not None:
+                self._feeds[feed][index] = value
+
+        return tuple(feed[index] for feed in self._feeds)
+
+
+    def setspeed(self, travel=None, draw=None, turn=None):
+        """
+        Set the speed of pen up moves, pen down moves and turns in place
+
+        Args:
+            travel (int, float): mm/s for moves with the pen up
+            draw (int, float): mm/s for moves with the pen down
+            turn (int, float): mm/s of wheel travel for turns in place
+
+        Settings that are None are not changed.
+
+        Returns:
+            tuple: current (travel, draw, turn) speeds in mm/s
+
+        Moves start and finish at the speed set by `_step_delay`, about
+        50mm/s, and accelerate to faster speeds.
+        """
+        return self._setfeeds(0, (travel, draw, turn))
+
+
+    def setacceleration(self, travel=None, draw=None, turn=None):
+        """
+        Set the acceleration of pen up moves, pen down moves and turns in
+        place, 0 for none
+
+        Args:
+            travel (int, float): mm/s/s for moves with the pen up
+            draw (int, float): mm/s/s for moves with the pen down
+            turn (int, float): mm/s/s of wheel travel for turns in place
+
+        Settings that are None are not changed.
+
+        Returns:
+            tuple: current (travel, draw, turn) accelerations in mm/s/s
+        """
+        return self._setfeeds(1, (travel, draw, turn))
 
 
-    def _movesteppers(self, left, right):
+    def setdrive(self, travel=None, draw=None, turn=None):
+        """
+        Set the stepper drive mode of pen up moves, pen down moves and turns
+        in place
+
+        Args:
+            travel (int): drive mode for moves with the pen up
+            draw (int): drive mode for moves with the pen down
+            turn (int): drive mode for turns in place
+
+        Drive modes are `stepkernel.HALF`, `stepkernel.FULL` and
+        `stepkernel.WAVE`. Full and wave drive move twice as far per step
+        with half the resolution. Settings that are None are not changed.
+
+        Returns:
+            tuple: current (travel, draw, turn) drive modes
+
+        By default pen up moves use full steps, everything else half-steps.
+        """
+        return self._setfeeds(2, (travel, draw, turn))
+
+
+    def _movesteppers(self, left, right, feed=DRAW):
         """
         Internal routine to step steppers
 
         Note:
-            Both steppers always move the same distance, but not
-            always in the same direction. De-energizes the stepper
-            coils after moving to save power.
+            The stepper with the most steps to take is stepped on every
+            tick, the other is spread evenly over the move so both finish
+            together. The stepper coils are held after the move and
+            de-energized to save power if no move follows within `hold_ms`.
 
         Args:
             left (float or integer): millimeters to move left stepper
             right (float or integer): millimeters to move right stepper
+            feed (optional int): speed to move at, TRAVEL, DRAW or TURN
 
         """
-        steppers = [int(left * _STEPS_PER_MM), int(right * _STEPS_PER_MM)]
-        steps = abs(steppers[_LEFT_MOTOR])
+        self._check()
+        if self.gc_control:
+            # pylint: disable=no-member
+            start = time.ticks_us()
+            gc.collect()
+            self._gc_us += time.ticks_diff(time.ticks_us(), start)
+            gc.disable()
+
+        move = self._plan(left, right, feed)
+        self._engage()
+        try:
+            while self._step(move, _CHECK_STEPS):
+                self._check(move)
+        finally:
+            if self.gc_control:
+                gc.enable()
+
+        self._idle()
+        self._segment_done(move)
 
-        for _ in range(steps):
+
+    def reset_diagnostics(self):
+        """
+        Clear the step timing and garbage collection diagnostics
+        """
+        self._max_gap_us = 0
+        self._late_steps = 0
+        self._gc_us = 0
+
+
+    def diagnostics(self):
+        """
+        Return step timing and garbage collection diagnostics since the last
+        `reset_diagnostics`.
+
+        Returns:
+            dict:
+                max_gap_us: longest time between two steps of a move in us
+                late_steps: steps more than `gap_budget_us` us late
+                gc_us: time spent collecting garbage before moves in us
+        """
+        return {
+            "max_gap_us": self._max_gap_us,
+            "late_steps": self._late_steps,
+            "gc_us": self._gc_us}
+
+
+    def _check(self, move=None):
+        """
+        Pause or cancel the plot if the joystick has queued a CENTER press.
+        Only looks at the joystick's event queue, no pins are read.
+
+        Args:
+            move (optional array): move paused part way, on resume it starts
+                again from rest and accelerates back to its cruise speed
+        """
+        if self.joystick is None or not self.joystick.pending():
+            return
+
+        event = self.joystick.event()
+        if event[0] != button.CENTER or event[1] != button.PRESSED:
+            return
+
+        # pause with the pen raised and the steppers holding position, the
+        # hold timer is stopped so the coils stay on however long it lasts
+        if self._drawing:
+            self._servo(False)
+
+        moving = self._moving
+        self._moving = True
+        if self._hold_timer is not None:
+            self._hold_timer.deinit()
+
+        btn = 0
+        while btn not in (button.CENTER, -button.CENTER, button.LEFT, -button.LEFT):
+            btn = self.joystick.read()
+
+        if btn != button.CENTER:
+            self._moving = False
+            self._release()
+            self._drawing = False
+            raise Cancelled()
+
+        if moving:
+            self._moving = True
+        elif self._held:
+            self._idle()
+        else:
+            self._moving = False
+
+        if self._drawing:
+            self._servo(True)
             # pylint: disable=no-member
-            last = time.ticks_us()
-            out = 0
-            for motor in _MOTORS:
-                if steppers[motor]:
-                    self._current_step[motor] &= 0x07
-                    mask = _STEP_MASKS[self._current_step[motor]]
-                    out |= mask <<4 if motor else mask
+            time.sleep_ms(self._pen_delay)
+
+        if move is not None:
+            stepkernel.resume(move)
+
 
-                    if steppers[motor] > 0:
-                        self._current_step[motor] -= 1
+    def _segment_done(self, move):
+        """
+        Count the steps of a finished move and update the progress view and
+        step trace if there are any. Called between moves while the steppers
+        are idle.
+
+        Args:
+            move (array): move returned by `_plan`
+        """
+        self.steps_taken += move[stepkernel.STEPS]
+        if self.trace is not None:
+            self.trace.move_done(self)
+        if self.progress is not None:
+            self.progress.update(self)
+
+
+    def _plan(self, left, right, feed=DRAW):
+        """
+        Plan a move for `_step`. Moves must be planned in order just before
+        they run as the plan depends on the coil phases and half-steps left
+        over from the previous move.
+
+        Args:
+            left (float or integer): millimeters to move left stepper
+            right (float or integer): millimeters to move right stepper
+            feed (optional int): speed to move at, TRAVEL, DRAW or TURN
+
+        Returns:
+            array: move returned by `stepkernel.plan`
+        """
+        speed, accel, drive = self._feeds[feed]
+        stride = 1 if drive == stepkernel.HALF else 2
+        per_mm = _STEPS_PER_MM / stride
+        move = stepkernel.plan(
+            int(left * _STEPS_PER_MM) + self._carry[0],
+            int(right * _STEPS_PER_MM) + self._carry[1],
+            int(1000000 / (speed * per_mm)),
+            self._step_delay * stride,
+            int(accel * per_mm),
+            drive,
+            self._current_step)
+
+        self._carry[0] = move[stepkernel.CARRY_LEFT]
+        self._carry[1] = move[stepkernel.CARRY_RIGHT]
+        return move
+
+
+    def _step(self, move, count):
+        """
+        Take up to count steps of a move planned by `_plan`
+
+        Args:
+            move (array): move returned by `_plan`
+            count (int): maximum number of steps to take
+
+        Returns:
+            int: number of steps remaining in the move
+        """
+        move[stepkernel.PHASE_LEFT], move[stepkernel.PHASE_RIGHT] = self._current_step
+        move[stepkernel.BUDGET] = self.gap_budget_us
+        move[stepkernel.LONGEST] = self._max_gap_us
+        move[stepkernel.LATE_STEPS] = 0
+
+        i2c = self.mcp23008 if self.trace is None else self.trace
+        # pylint: disable=no-member
+        remaining = self.kernel(move, count, i2c, self._out, time.ticks_us)
+
+        self._current_step[0] = move[stepkernel.PHASE_LEFT]
+        self._current_step[1] = move[stepkernel.PHASE_RIGHT]
+        self._max_gap_us = move[stepkernel.LONGEST]
+        self._late_steps += move[stepkernel.LATE_STEPS]
+        return remaining
 
-                    if steppers[motor] < 0:
-                        self._current_step[motor] += 1
 
-            self.mcp23008.writeto_mem(0x20, 0x9, bytearray([out]))
+    def _engage(self):
+        """
+        Called before a move starts, counts the release saved if the coils
+        are still held from the last move.
+        """
+        self._moving = True
+        if self._held:
+            self._held = False
+            self.writes_saved += 1
 
-            while time.ticks_diff(time.ticks_us(), last) < self._step_delay:
-                time.sleep_us(100)
 
-        # de-energize stepper coils between moves to save power
+    def _idle(self):
+        """
+        Called after a move, holds the coils for `hold_ms` ms in case another
+        move follows, then releases them.
+        """
+        self._moving = False
+        if not self.hold_ms:
+            self._release()
+            return
+
+        self._held = True
+        if self._hold_timer is None:
+            self._hold_timer = timers.timer(timers.HOLD)
+
+        self._hold_timer.init(
+            period=self.hold_ms,
+            mode=machine.Timer.ONE_SHOT,
+            callback=self._expired)
+
+
+    def _expired(self, _):
+        """
+        Hold timer callback, defer the release until it is safe to use the bus
+        """
+        micropython.schedule(self._release_ref, None)
+
+
+    def _scheduled_release(self, _):
+        """
+        micropython.schedule callback, releases the coils if no move started
+        """
+        if self._held and not self._moving:
+            self._release()
+
+
+    def _release(self):
+        """
+        De-energize the stepper coils between moves to save power
+        """
+        self._held = False
+        if self._hold_timer is not None:
+            self._hold_timer.deinit()
         self.mcp23008.writeto_mem(0x20, 0x9, bytes([0x00]))  # all pins low
 
 
@@ -170,7 +499,7 @@ class TurtlePlotBot(TurtlePlot):  # pylint: disable=too-many-instance-attributes
         This Method overrides the TurtlePlotBot method
         """
         distance = _WHEEL_BPI * (angle / 360.0)
-        self._movesteppers(-distance, -distance)
+        self._movesteppers(-distance, -distance, TURN)
 
 
     def _move(self, distance):
@@ -182,7 +511,24 @@ class TurtlePlotBot(TurtlePlot):  # pylint: disable=too-many-instance-attributes
 
         This Method overrides the TurtlePlotBot method
         """
-        self._movesteppers(-distance, distance)
+        if self._drawing:
+            self.distance_drawn += abs(distance)
+        self._movesteppers(-distance, distance, DRAW if self._drawing else TRAVEL)
+
+
+    def _arc(self, distance, angle):
+        """
+        Drive the TurtlePlotBot distance millimeters along an arc while
+        turning left angle degrees
+
+        Args:
+            distance (integer or float): length of the arc
+            angle (integer or float): turn left degrees
+
+        This Method overrides the TurtlePlotBot method
+        """
+        turn = _WHEEL_BPI * (angle / 360.0)
+        self._movesteppers(-distance - turn, distance - turn, DRAW if self._drawing else TRAVEL)
 
 
     def _pen(self, down):
@@ -194,12 +540,22 @@ class TurtlePlotBot(TurtlePlot):  # pylint: disable=too-many-instance-attributes
 
         This Method overrides the TurtlePlotBot method
         """
+        self._servo(down)
+        # pylint: disable=no-member
+        time.sleep_ms(self._pen_delay)
+
+
+    def _servo(self, down):
+        """
+        move the pen servo to the up or down position without waiting
+
+        Args:
+                down (boolean):
+        """
         if down:
             self._pen_servo.write_angle(degrees=_PEN_DOWN_ANGLE)
         else:
             self._pen_servo.write_angle(degrees=_PEN_UP_ANGLE)
-        # pylint: disable=no-member
-        time.sleep_ms(self._pen_delay)
 
 
     def done(self):
@@ -208,5 +564,5 @@ class TurtlePlotBot(TurtlePlot):  # pylint: disable=too-many-instance-attributes
         """
         self.penup()
         self._pen_servo.deinit()
-        self.mcp23008.writeto_mem(0x20, 0x9, bytes([0x00])) # all outputs to zero
+        self._release()                                     # all outputs to zero
         self.mcp23008.writeto_mem(0x20, 0x0, bytes([0xff])) # all pins as inputs
@@ -1,5 +1,7 @@
 """
 hello.py: Simple example using write
+
+Time: 3 min
 """
 #pylint: disable-msg=import-error
 from turtleplotbot import TurtlePlotBot
@@ -1,10 +1,20 @@
 '''
 Write text using user provided values
+
+Parameters: message, scale, font
 '''
 #pylint: disable-msg=import-error
 import uos
-from turtleplotbot import TurtlePlotBot
+from turtleplotbot import TurtlePlotBot, Cancelled
 import oledui
+import progress
+
+def write(bot, message, scale, font):
+    """
+    Write message in font at scale, used to estimate the time to draw
+    """
+    bot.setscale(scale)
+    bot.write(message, font)
 
 def main():
     """
@@ -37,10 +47,16 @@ def main():
                 uio.draw(message, 0, 32, "/fonts/" + fonts[font])
                 response = uio.select(7, 0, ("Draw", "Back", "Cancel"), 0)
                 if response[1] == 0:
-                    uio.cls(0)
-                    bot = TurtlePlotBot()
+                    bot = TurtlePlotBot(joystick=uio.joystick)
                     bot.setscale(scale)
-                    bot.write(message, "/fonts/" + fonts[font])
+                    view = progress.Progress(uio, bot, "Writing")
+                    view.estimate(write, message, scale, "/fonts/" + fonts[font])
+                    view.start()
+                    try:
+                        bot.write(message, "/fonts/" + fonts[font])
+                        view.finish()
+                    except Cancelled:
+                        view.cancel()
                     bot.done()
 
                 again = response[1] == 1
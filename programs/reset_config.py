@@ -38,6 +38,7 @@ def main():
     response = uio.select(7, 0, ("Reset", "Cancel"), 0)
     if response[1] == 0:
         reset_cfg()
+        uio.cfg.reload()
         uio.cls("Resetting", 3)
         uio.wait("Press to Continue", 7)
 
@@ -17,7 +17,7 @@ def main():
     font_current = 0
     again = True
 
-    joystick = button.JoyStick()
+    joystick = uio.joystick
 
     while again:
         uio.cls(fonts[font_current], 0)
@@ -1,8 +1,11 @@
 '''
 Draw a star from user provided values
+
+Parameters: points, length
+Time: 20 sec
 '''
 #pylint: disable-msg=import-error
-from turtleplotbot import TurtlePlotBot
+from turtleplotbot import TurtlePlotBot, Cancelled
 import oledui
 
 def star(bot, points, length):
@@ -45,8 +48,11 @@ def main():
         points = form[2][uio.VAL]
         length = form[4][uio.VAL]
 
-        bot = TurtlePlotBot()
-        star(bot, points, length)
+        bot = TurtlePlotBot(joystick=uio.joystick)
+        try:
+            star(bot, points, length)
+        except Cancelled:
+            pass
 
 main()
 